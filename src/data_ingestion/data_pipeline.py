@@ -52,7 +52,8 @@ class DataIngestionPipeline:
         # Country mappings
         self.country_mappings = self._load_country_mappings()
     
-    def _load_country_mappings(self) -> Dict:
+    @staticmethod
+    def _load_country_mappings() -> Dict:
         """Load country code mappings (ISO2, ISO3, names)"""
         # Simplified mapping - in production, load from comprehensive dataset
         return {
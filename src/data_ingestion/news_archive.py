@@ -0,0 +1,323 @@
+"""
+News Archive Module
+Streams local JSONL/gzip news and statement archives into narrative scoring
+
+Author: Gabriel Demetrios Lafis
+"""
+
+import glob
+import gzip
+import itertools
+import json
+import logging
+import os
+import re
+import numpy as np
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from joblib import Parallel, delayed
+
+from data_ingestion.data_pipeline import DataIngestionPipeline
+from models.keyword_matcher import KeywordMatcher
+
+
+# Extra names per country (demonyms, capitals, leaders' seats) on top of the
+# country names in DataIngestionPipeline.country_mappings; names shared with
+# other places ("Latin American", "South America") are left out
+DEFAULT_ALIASES = {
+    'USA': ['united states', 'washington', 'white house', 'pentagon'],
+    'CHN': ['chinese', 'beijing'],
+    'RUS': ['russian', 'moscow', 'kremlin'],
+    'GBR': ['britain', 'british', 'london', 'downing street'],
+    'FRA': ['french', 'paris', 'elysee'],
+    'DEU': ['german', 'berlin'],
+    'JPN': ['japanese', 'tokyo'],
+    'IND': ['indian', 'new delhi'],
+    'BRA': ['brazilian', 'brasilia'],
+    'IRN': ['iranian', 'tehran'],
+    'ISR': ['israeli', 'jerusalem', 'tel aviv'],
+    'SAU': ['saudi', 'riyadh'],
+    'TUR': ['turkish', 'turkiye', 'ankara'],
+    'UKR': ['ukrainian', 'kyiv', 'kiev'],
+    'PRK': ['north korean', 'pyongyang'],
+    'KOR': ['south korean', 'seoul'],
+    'EGY': ['egyptian', 'cairo'],
+    'PAK': ['pakistani', 'islamabad'],
+    'IDN': ['indonesian', 'jakarta']
+}
+
+# Phrases containing a country name or alias that do not refer to the country
+DEFAULT_EXCLUSIONS = [
+    'indian ocean', 'american indian', 'west indian',
+    'paris hilton', 'paris, texas',
+    'washington state', 'washington post', 'george washington', 'denzel washington',
+    'university of washington',
+    'german measles', 'german shepherd',
+    'french fries', 'french toast', 'french press',
+    'fine china', 'bone china',
+    'cold turkey', 'roast turkey', 'thanksgiving turkey',
+    'brazil nut'
+]
+
+# Country routers built inside worker processes, keyed by alias matcher version, codes and exclusions
+_WORKER_ROUTERS = {}
+
+
+def _code_pattern(codes: Sequence[str]) -> re.Pattern:
+    """Case-sensitive, whole-word pattern of ISO3 codes ("RUS" but not "Rus" or "bra")"""
+    return re.compile(r'\b(' + '|'.join(sorted(map(re.escape, codes))) + r')\b')
+
+
+def _exclusion_pattern(phrases: Sequence[str]) -> Optional[re.Pattern]:
+    """Case-insensitive, whole-word pattern of phrases that never route (None if there are none)"""
+    if not phrases:
+        return None
+    alternation = '|'.join(
+        r'\s+'.join(map(re.escape, phrase.split())) for phrase in sorted(phrases, key=len, reverse=True)
+    )
+    return re.compile(r'\b(?:' + alternation + r')(?:s|es)?\b', re.IGNORECASE)
+
+
+def _parse_lines(lines: List[str], config: Dict) -> Dict[str, list]:
+    """Parse and route one batch of archive lines (runs inside a worker process)"""
+    key = (config['version'], tuple(config['codes']), tuple(config['exclusions']))
+    routers = _WORKER_ROUTERS.get(key)
+    if routers is None:
+        routers = (KeywordMatcher(config['aliases']), _code_pattern(config['codes']),
+                   _exclusion_pattern(config['exclusions']))
+        _WORKER_ROUTERS[key] = routers
+    return _route_records(lines, config, *routers)
+
+
+def _route_records(lines: List[str], config: Dict, router: KeywordMatcher,
+                   code_pattern: re.Pattern, exclusion_pattern: Optional[re.Pattern]) -> Dict[str, list]:
+    """Decode JSON lines and assign every text to the countries it mentions"""
+    texts, sources, timestamps, explicit = [], [], [], []
+    malformed = empty = 0
+
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            malformed += 1
+            continue
+        if not isinstance(record, dict):
+            malformed += 1
+            continue
+
+        text = '. '.join(str(record[field]) for field in config['text_fields'] if record.get(field))
+        if not text:
+            empty += 1
+            continue
+        texts.append(text)
+        sources.append(record.get(config['source_field']))
+        timestamps.append(record.get(config['timestamp_field']))
+        explicit.append(record.get(config['country_field']))
+
+    batch = {'texts': [], 'sources': [], 'timestamps': [], 'text_index': [], 'countries': [],
+             'malformed': malformed, 'empty': empty, 'routed': 0, 'unrouted': 0}
+    if not texts:
+        return batch
+
+    # (texts x countries) mention matrix from one alias-matcher pass, with
+    # exclusion phrases ("Indian Ocean") blanked out, plus ISO3 codes
+    # written in capitals
+    alias_texts = texts if exclusion_pattern is None else [exclusion_pattern.sub(' ', text) for text in texts]
+    mentions = np.asarray(router.term_matrix(alias_texts) @ router.category_matrix) > 0
+    for i, text in enumerate(texts):
+        for code in code_pattern.findall(text):
+            mentions[i, router.categories.index(code)] = True
+    for i, country in enumerate(explicit):
+        if country in router.lexicons:
+            mentions[i] = False
+            mentions[i, router.categories.index(country)] = True
+
+    # Routed texts are kept once; assignments point at them by position
+    routed = np.flatnonzero(mentions.any(axis=1))
+    rows, columns = np.nonzero(mentions[routed])
+    batch['routed'] = len(routed)
+    batch['unrouted'] = len(texts) - len(routed)
+    batch['texts'] = [texts[i] for i in routed]
+    batch['sources'] = [sources[i] for i in routed]
+    batch['timestamps'] = [timestamps[i] for i in routed]
+    batch['text_index'] = rows.tolist()
+    batch['countries'] = [router.categories[j] for j in columns]
+
+    return batch
+
+
+class NewsArchiveReader:
+    """
+    Lazy reader for local JSONL (optionally gzip-compressed) news archives.
+
+    Files are decompressed and read line by line in bounded batches, never
+    loaded whole. Batches are JSON-decoded and routed to countries in a
+    joblib worker pool; each text goes to every country whose name or alias
+    it mentions, or whose ISO3 code it contains in capitals (or to the
+    record's own country field), using one compiled alias matcher per
+    worker. Names and aliases match case-insensitively, except inside
+    exclusion phrases ("Indian Ocean", "Paris Hilton"); codes match only in
+    capitals, so words such as "bra" or "Ind." are not read as codes. Routed
+    batches feed ``GTIAccumulator``/``WindowedGTIIndex`` updates or
+    ``stream_gti``.
+
+    ``stats`` describes the last run (reset whenever ``iter_batches`` starts):
+    'lines' non-blank lines read, 'malformed' lines that are not a JSON
+    object, 'empty' records without text, 'routed'/'unrouted' texts with
+    and without a country, and 'assignments' (text, country) pairs emitted.
+    Every line is counted once in 'malformed', 'empty', 'routed' or
+    'unrouted'.
+    """
+
+    def __init__(self, country_mappings: Optional[Dict] = None, aliases: Optional[Dict[str, List[str]]] = None,
+                 text_fields: Sequence[str] = ('title', 'text'), source_field: str = 'source_type',
+                 timestamp_field: str = 'published', country_field: str = 'country',
+                 batch_size: int = 5000, n_jobs: int = 1, exclusions: Optional[Sequence[str]] = None):
+        """
+        Initialize the reader
+
+        Args:
+            country_mappings (Optional[Dict]): ISO3 -> {'name', ...} country index
+                (default: DataIngestionPipeline country mappings)
+            aliases (Optional[Dict[str, List[str]]]): ISO3 -> extra names (default: DEFAULT_ALIASES)
+            text_fields (Sequence[str]): Record fields joined into the text
+            source_field (str): Record field with the source type
+            timestamp_field (str): Record field with the publication time
+            country_field (str): Record field with an explicit ISO3 country
+            batch_size (int): Lines per parse/route batch
+            n_jobs (int): Worker processes for parsing and routing (-1 uses all cores)
+            exclusions (Optional[Sequence[str]]): Phrases whose names never
+                route a text (default: DEFAULT_EXCLUSIONS)
+        """
+        self.logger = logging.getLogger(__name__)
+        self.country_mappings = country_mappings or DataIngestionPipeline._load_country_mappings()
+        aliases = DEFAULT_ALIASES if aliases is None else aliases
+
+        lexicons = {
+            iso3: [mapping['name']] + list(aliases.get(iso3, []))
+            for iso3, mapping in self.country_mappings.items()
+        }
+        self.router = KeywordMatcher(lexicons)
+        self.code_pattern = _code_pattern(list(lexicons))
+        exclusions = list(DEFAULT_EXCLUSIONS if exclusions is None else exclusions)
+        self.exclusion_pattern = _exclusion_pattern(exclusions)
+        self.config = {
+            'version': self.router.version,
+            'aliases': lexicons,
+            'codes': list(lexicons),
+            'exclusions': exclusions,
+            'text_fields': tuple(text_fields),
+            'source_field': source_field,
+            'timestamp_field': timestamp_field,
+            'country_field': country_field
+        }
+        self.batch_size = batch_size
+        self.n_jobs = n_jobs
+        self.stats = self._empty_stats()
+
+    @staticmethod
+    def _empty_stats() -> Dict[str, int]:
+        """Zeroed run counters (see the class docstring for their units)"""
+        return {'lines': 0, 'malformed': 0, 'empty': 0, 'routed': 0, 'unrouted': 0, 'assignments': 0}
+
+    @staticmethod
+    def archive_paths(source: str) -> List[str]:
+        """
+        Archive files of a directory, glob or single path
+
+        Args:
+            source (str): Directory (``*.jsonl``/``*.jsonl.gz``), glob or file
+
+        Returns:
+            List[str]: Sorted file paths
+        """
+        if os.path.isdir(source):
+            return sorted(glob.glob(os.path.join(source, '*.jsonl')) + glob.glob(os.path.join(source, '*.jsonl.gz')))
+        return sorted(glob.glob(source))
+
+    def iter_line_batches(self, source: str) -> Iterator[List[str]]:
+        """
+        Lazily read archive lines in batches
+
+        Args:
+            source (str): Directory, glob or file
+
+        Yields:
+            List[str]: Up to ``batch_size`` raw lines
+        """
+        for path in self.archive_paths(source):
+            opener = gzip.open if path.endswith('.gz') else open
+            with opener(path, 'rt', encoding='utf-8') as f:
+                lines = (line for line in f if line.strip())
+                while True:
+                    batch = list(itertools.islice(lines, self.batch_size))
+                    if not batch:
+                        break
+                    self.stats['lines'] += len(batch)
+                    yield batch
+
+    def iter_batches(self, source: str) -> Iterator[Dict[str, list]]:
+        """
+        Stream routed batches of (text, source, timestamp, country) columns
+
+        Args:
+            source (str): Directory, glob or file
+
+        Yields:
+            Dict[str, list]: 'texts', 'sources' and 'timestamps' (one entry
+            per routed text), 'text_index' and 'countries' (one entry per
+            text and mentioned country)
+        """
+        self.stats = self._empty_stats()
+        line_batches = self.iter_line_batches(source)
+
+        if self.n_jobs == 1:
+            routed = (
+                _route_records(lines, self.config, self.router, self.code_pattern, self.exclusion_pattern)
+                for lines in line_batches
+            )
+        else:
+            # Ordered, lazily consumed results with a bounded number of batches in flight
+            routed = Parallel(n_jobs=self.n_jobs, return_as='generator', pre_dispatch='2*n_jobs')(
+                delayed(_parse_lines)(lines, self.config) for lines in line_batches
+            )
+
+        for batch in routed:
+            for counter in ('malformed', 'empty', 'routed', 'unrouted'):
+                self.stats[counter] += batch.pop(counter)
+            self.stats['assignments'] += len(batch['countries'])
+            if batch['texts']:
+                yield batch
+
+    def stream_items(self, source: str) -> Iterator[Tuple]:
+        """
+        Stream ``(text, source, timestamp, country)`` items for ``NarrativeAnalyzer.stream_gti``
+
+        Args:
+            source (str): Directory, glob or file
+
+        Yields:
+            Tuple: One item per text and mentioned country
+        """
+        for batch in self.iter_batches(source):
+            for i, country in zip(batch['text_index'], batch['countries']):
+                yield batch['texts'][i], batch['sources'][i], batch['timestamps'][i], country
+
+    def feed(self, target, source: str):
+        """
+        Score an archive into a GTI accumulator or windowed index batch by batch
+
+        Each text is scored once, however many countries it is routed to.
+
+        Args:
+            target: ``GTIAccumulator`` or ``WindowedGTIIndex``
+            source (str): Directory, glob or file
+
+        Returns:
+            The updated target
+        """
+        for batch in self.iter_batches(source):
+            target.update(batch['texts'], batch['sources'], batch['countries'], batch['timestamps'],
+                          text_index=batch['text_index'])
+
+        self.logger.info(f"Archive ingestion: {self.stats}")
+        return target
@@ -0,0 +1,274 @@
+"""
+Embedding Scorer Module
+Optional sentence-embedding tension scorer with an on-disk embedding cache
+
+Author: Gabriel Demetrios Lafis
+"""
+
+import hashlib
+import json
+import logging
+import os
+import uuid
+import numpy as np
+from typing import Callable, Dict, List, Optional, Sequence
+from sklearn.linear_model import Ridge
+
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:  # optional dependency
+    SentenceTransformer = None
+
+try:
+    import torch
+except ImportError:  # optional dependency
+    torch = None
+
+
+class EmbeddingStore:
+    """
+    Append-only float16 embedding store keyed by text hash.
+
+    Vectors live in one memory-mapped ``embeddings.f16`` file that grows by
+    doubling; the 16-byte text digests are appended to ``keys.bin`` in row
+    order and loaded into a dict on open. Looking up an already embedded
+    text is a dict hit plus a row read from the page cache.
+    """
+
+    def __init__(self, directory: str, dim: int, initial_capacity: int = 1024,
+                 encoder_id: Optional[str] = None):
+        """
+        Open (or create) a store
+
+        Args:
+            directory (str): Store directory
+            dim (int): Embedding dimension
+            initial_capacity (int): Rows allocated for a new store
+            encoder_id (Optional[str]): Fingerprint of the encoder that fills
+                the store; opening it with another encoder raises
+        """
+        self.directory = directory
+        self.dim = dim
+        os.makedirs(directory, exist_ok=True)
+
+        meta_path = os.path.join(directory, 'metadata.json')
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+            if meta['dim'] != dim:
+                raise ValueError(f"Store dimension {meta['dim']} does not match encoder dimension {dim}")
+            if encoder_id and meta.get('encoder') not in (None, encoder_id):
+                raise ValueError(f"Store {directory} holds embeddings of another encoder ({meta['encoder']})")
+        else:
+            with open(meta_path, 'w') as f:
+                json.dump({'dim': dim, 'dtype': 'float16', 'encoder': encoder_id}, f)
+
+        self.index = {}
+        keys_path = os.path.join(directory, 'keys.bin')
+        if os.path.exists(keys_path):
+            with open(keys_path, 'rb') as f:
+                raw = f.read()
+            for row in range(len(raw) // 16):
+                self.index[raw[row * 16:(row + 1) * 16]] = row
+        self._keys_file = open(keys_path, 'ab')
+
+        self._path = os.path.join(directory, 'embeddings.f16')
+        rows_on_disk = os.path.getsize(self._path) // (2 * dim) if os.path.exists(self._path) else 0
+        self._map(max(rows_on_disk, len(self.index), initial_capacity))
+
+    def _map(self, capacity: int):
+        """(Re)map the vector file with room for ``capacity`` rows"""
+        with open(self._path, 'ab') as f:
+            f.truncate(capacity * self.dim * 2)
+        self.vectors = np.memmap(self._path, dtype=np.float16, mode='r+', shape=(capacity, self.dim))
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def lookup(self, keys: Sequence[bytes]) -> np.ndarray:
+        """Row of every key (-1 when missing)"""
+        return np.fromiter((self.index.get(key, -1) for key in keys), dtype=np.int64, count=len(keys))
+
+    def add(self, keys: Sequence[bytes], vectors: np.ndarray):
+        """Append new vectors"""
+        start = len(self.index)
+        if start + len(keys) > self.vectors.shape[0]:
+            self.vectors.flush()
+            self._map(max(2 * self.vectors.shape[0], start + len(keys)))
+
+        self.vectors[start:start + len(keys)] = vectors.astype(np.float16)
+        for offset, key in enumerate(keys):
+            self.index[key] = start + offset
+        self._keys_file.write(b''.join(keys))
+
+    def flush(self):
+        """Persist pending writes"""
+        self.vectors.flush()
+        self._keys_file.flush()
+
+    def close(self):
+        """Flush and close the store"""
+        self.flush()
+        self._keys_file.close()
+
+
+class EmbeddingScorer:
+    """
+    Tension scorer on sentence embeddings, running on CPU.
+
+    Texts are encoded in large batches and their embeddings cached by text
+    hash in an ``EmbeddingStore``, so re-scoring old texts costs a lookup.
+    The head is a Ridge regression fit on labelled texts, or, until one is
+    fit, the cosine margin between the high-tension and diplomatic keyword
+    prototypes. ``version`` identifies the encoder (by the embedding of a
+    probe text) and the head, so caches never mix scores of two scorers.
+    """
+
+    # Encoders see the exact text, so case and spacing can change a score
+    normalizes_text = False
+
+    def __init__(self, model_name: str = 'sentence-transformers/all-MiniLM-L6-v2',
+                 cache_dir: Optional[str] = None, batch_size: int = 256,
+                 encoder: Optional[Callable] = None):
+        """
+        Initialize the scorer
+
+        Args:
+            model_name (str): sentence-transformers model
+            cache_dir (Optional[str]): Embedding store directory (None disables caching)
+            batch_size (int): Texts per encoder batch
+            encoder (Optional[Callable]): Custom texts -> (n, dim) array encoder,
+                used instead of sentence-transformers
+        """
+        self.logger = logging.getLogger(__name__)
+        self.model_name = model_name
+        self.batch_size = batch_size
+
+        if encoder is None:
+            if SentenceTransformer is None:
+                raise ImportError("EmbeddingScorer requires sentence-transformers (pip install sentence-transformers)")
+            model = SentenceTransformer(model_name, device='cpu')
+            encoder = lambda texts: model.encode(texts, batch_size=batch_size, convert_to_numpy=True,
+                                                 normalize_embeddings=True, show_progress_bar=False)
+        self.encoder = encoder
+
+        probe = np.asarray(self.encoder(['dimension probe']), dtype=np.float32)
+        self.dim = int(probe.shape[1])
+        self.encoder_id = self._digest(probe)
+        self.store = EmbeddingStore(cache_dir, self.dim, encoder_id=self.encoder_id) if cache_dir else None
+
+        self.head = None
+        self.prototypes = None
+        self.version = f"{model_name}-{self.encoder_id}-prototype"
+
+    @staticmethod
+    def set_num_threads(num_threads: int):
+        """
+        Limit torch intra-op threads (process-wide; call explicitly if wanted)
+
+        Args:
+            num_threads (int): Threads used by torch for encoding
+        """
+        if torch is None:
+            raise ImportError("Setting encoder threads requires torch")
+        torch.set_num_threads(num_threads)
+
+    @staticmethod
+    def _digest(array: np.ndarray) -> str:
+        """Short hex digest of an array's float32 contents"""
+        return hashlib.blake2b(np.ascontiguousarray(array, dtype=np.float32).tobytes(), digest_size=6).hexdigest()
+
+    @staticmethod
+    def _key(text: str) -> bytes:
+        """16-byte digest of a text"""
+        return hashlib.blake2b(text.encode(), digest_size=16).digest()
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Embeddings of the texts, encoding only those not cached yet
+
+        Args:
+            texts (Sequence[str]): Texts
+
+        Returns:
+            np.ndarray: (n_texts, dim) float32 embeddings
+        """
+        if self.store is None:
+            return self._encode(list(texts))
+
+        keys = [self._key(text) for text in texts]
+        rows = self.store.lookup(keys)
+
+        missing = {}
+        for i in np.flatnonzero(rows < 0):
+            missing.setdefault(keys[i], i)
+        if missing:
+            self.store.add(list(missing), self._encode([texts[i] for i in missing.values()]))
+            self.store.flush()
+            rows = self.store.lookup(keys)
+
+        return np.asarray(self.store.vectors[rows], dtype=np.float32)
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """Encode texts in batches"""
+        parts = [
+            np.asarray(self.encoder(texts[start:start + self.batch_size]), dtype=np.float32)
+            for start in range(0, len(texts), self.batch_size)
+        ]
+        return np.concatenate(parts) if parts else np.zeros((0, self.dim), dtype=np.float32)
+
+    def set_prototypes(self, lexicons: Dict[str, List[str]]):
+        """
+        Build the prototype head from keyword lexicons
+
+        Args:
+            lexicons (Dict[str, List[str]]): Needs 'high_tension' and 'diplomatic' term lists
+        """
+        self.prototypes = np.stack([
+            self._unit(self._encode(lexicons['high_tension']).mean(axis=0)),
+            self._unit(self._encode(lexicons['diplomatic']).mean(axis=0))
+        ])
+        if self.head is None:
+            self.version = f"{self.model_name}-{self.encoder_id}-prototype-{self._digest(self.prototypes)}"
+
+    @staticmethod
+    def _unit(vectors: np.ndarray) -> np.ndarray:
+        """L2-normalize along the last axis"""
+        return vectors / np.maximum(np.linalg.norm(vectors, axis=-1, keepdims=True), 1e-12)
+
+    def fit(self, texts: Sequence[str], tension_scores: Sequence[float], alpha: float = 1.0) -> 'EmbeddingScorer':
+        """
+        Fit a Ridge head mapping embeddings to tension scores
+
+        Args:
+            texts (Sequence[str]): Labelled texts
+            tension_scores (Sequence[float]): Target tension score (0-100) per text
+            alpha (float): Ridge regularization
+
+        Returns:
+            EmbeddingScorer: self
+        """
+        self.head = Ridge(alpha=alpha).fit(self.embed(texts), np.asarray(tension_scores, dtype=np.float64))
+        self.version = f"{self.model_name}-{self.encoder_id}-{uuid.uuid4().hex[:12]}"
+        return self
+
+    def score(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Tension score (0-100) per text
+
+        Args:
+            texts (Sequence[str]): Texts
+
+        Returns:
+            np.ndarray: Tension scores
+        """
+        embeddings = self.embed(texts)
+
+        if self.head is not None:
+            return np.clip(self.head.predict(embeddings), 0, 100)
+
+        if self.prototypes is None:
+            raise ValueError("Call fit() or set_prototypes() before scoring")
+        similarity = self._unit(embeddings) @ self.prototypes.T
+
+        return np.clip(50 + 100 * (similarity[:, 0] - similarity[:, 1]), 0, 100)
@@ -7,11 +7,72 @@ Author: Gabriel Demetrios Lafis
 
 import pandas as pd
 import numpy as np
+from scipy import sparse, stats
+from sklearn.base import clone
 from sklearn.ensemble import GradientBoostingRegressor
-from sklearn.model_selection import train_test_split
+from sklearn.linear_model import SGDRegressor
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import train_test_split, TimeSeriesSplit, HalvingGridSearchCV
 from sklearn.metrics import mean_squared_error, r2_score
 import joblib
+from joblib import Parallel, delayed
+import copy
+import glob
+import hashlib
+import json
 import logging
+import os
+import shutil
+import tempfile
+import time
+import uuid
+
+from models.result_cache import ResultCache
+from models.tree_ensemble import FlatTreeEnsemble
+
+
+def _fit_window(estimator, X, y, train_idx, test_idx):
+    """Fit and score one backtest window (runs inside a worker process)"""
+    start = time.perf_counter()
+    estimator.fit(X[train_idx], y[train_idx])
+    y_pred = estimator.predict(X[test_idx])
+    mse = mean_squared_error(y[test_idx], y_pred)
+    
+    return {
+        'rmse': float(np.sqrt(mse)),
+        'r2': float(r2_score(y[test_idx], y_pred)) if len(test_idx) > 1 else float('nan'),
+        'compute_seconds': time.perf_counter() - start
+    }
+
+
+def _fit_horizon(estimator, X, y, train_idx, test_idx):
+    """Fit one forecast horizon and score it on later periods (runs inside a worker process)"""
+    start = time.perf_counter()
+    estimator.fit(X[train_idx], y[train_idx])
+    
+    rmse = float('nan')
+    if len(test_idx):
+        rmse = float(np.sqrt(mean_squared_error(y[test_idx], estimator.predict(X[test_idx]))))
+    
+    return estimator, rmse, time.perf_counter() - start
+
+
+def _permutation_drops(model, X, y, column, n_repeats, seed, baseline_rmse, feature_names=None):
+    """RMSE increase for each shuffle of one column (runs inside a worker process)"""
+    rng = np.random.RandomState(seed)
+    X_permuted = np.array(X)
+    original = X_permuted[:, column].copy()
+    
+    drops = np.empty(n_repeats)
+    for repeat in range(n_repeats):
+        X_permuted[:, column] = original[rng.permutation(len(original))]
+        X_input = pd.DataFrame(X_permuted, columns=feature_names, copy=False) if feature_names else X_permuted
+        drops[repeat] = np.sqrt(mean_squared_error(y, model.predict(X_input))) - baseline_rmse
+    
+    return drops
+
 
 class EventPredictor:
     """
@@ -19,18 +80,81 @@ class EventPredictor:
     and structural features.
     """
     
-    def __init__(self, model_type='gradient_boosting'):
+    def __init__(self, model_type='gradient_boosting', feature_dtype='float32'):
         """
         Initialize the Event Predictor
         
         Args:
-            model_type (str): Type of model to use ('gradient_boosting', 'random_forest')
+            model_type (str): Type of model to use ('gradient_boosting', 'sgd')
+            feature_dtype (str): Floating point type of feature matrices
+                ('float32' halves memory; trees split on float32 anyway)
         """
         self.model_type = model_type
+        self.feature_dtype = np.dtype(feature_dtype)
         self.model = None
         self.feature_columns = None
         self.is_trained = False
         
+        # Identifies the fitted model and the data it was trained on
+        self.model_version = None
+        self.data_fingerprint = None
+        
+        # Default hyperparameters for the gradient boosting model
+        self.model_params = {
+            'n_estimators': 100,
+            'learning_rate': 0.1,
+            'max_depth': 6,
+            'random_state': 42
+        }
+        
+        # Hyperparameters for the incremental (out-of-core) linear model
+        self.sgd_params = {
+            'loss': 'squared_error',
+            'penalty': 'l2',
+            'alpha': 1e-4,
+            'learning_rate': 'invscaling',
+            'eta0': 0.01,
+            'random_state': 42
+        }
+        
+        # Search space for hyperparameter tuning
+        self.param_grid = {
+            'learning_rate': [0.03, 0.1, 0.3],
+            'max_depth': [3, 4, 6],
+            'n_estimators': [50, 100, 200],
+            'subsample': [0.8, 1.0]
+        }
+        
+        # Multi-horizon forecast models (months ahead -> fitted model)
+        self.horizons = (1, 3, 6)
+        self.horizon_models = {}
+        self.horizon_feature_columns = None
+        
+        # Neighbour weights for spatial/network lag features (see set_spatial_weights)
+        self.spatial_weights = None
+        
+        # Batches up to this size use the compiled array-based tree path. Its
+        # cost grows with rows x trees while sklearn's is mostly per-call
+        # overhead: measured on 100 trees of depth 6, 0.1ms vs 0.7ms at 1 row,
+        # break-even near 48 rows and 2.5x slower at 256 rows
+        self.compiled_batch_size = 32
+        self._compiled_model = None
+        
+        # Incremental training state
+        self.baseline_rmse = None
+        self.last_trained_period = None
+        self.updates_since_full_fit = 0
+        
+        # Optional prediction cache (see enable_prediction_cache)
+        self.prediction_cache = None
+        
+        # Permutation importance results for the current model version
+        self._importance_cache = {}
+        
+        # Feature matrices keyed by data fingerprint, shared by train/backtest
+        self._feature_cache = {}
+        self._max_feature_cache = 4
+        
         # Setup logging
         logging.basicConfig(level=logging.INFO)
         self.logger = logging.getLogger(__name__)
@@ -47,27 +171,241 @@ class EventPredictor:
         """
         features = data.copy()
         
+        for name, values in self._engineer_features(data).items():
+            features[name] = values
+        
+        return features
+    
+    def _engineer_features(self, data, regional_means=None, conflict_history=None):
+        """
+        Compute the engineered feature columns without copying the input
+        
+        Args:
+            data (pd.DataFrame): Raw conflict data
+            regional_means (pd.Series): Optional mean fatalities per (region,
+                period) over a larger dataset than ``data`` (see
+                ``train_streaming``); computed from ``data`` when omitted
+            conflict_history (dict): Optional (country, period) fatality
+                history for the spatial lags (default: the training history)
+            
+        Returns:
+            dict: Feature name -> pd.Series aligned with ``data``
+        """
+        engineered = {}
+        by_country = data.groupby('country')
+        dates = pd.to_datetime(data['date'])
+        
         # Lagged conflict variables (conflict trap)
-        features['conflict_lag_1'] = features.groupby('country')['fatalities'].shift(1).fillna(0)
-        features['conflict_lag_2'] = features.groupby('country')['fatalities'].shift(2).fillna(0)
+        engineered['conflict_lag_1'] = by_country['fatalities'].shift(1).fillna(0)
+        engineered['conflict_lag_2'] = by_country['fatalities'].shift(2).fillna(0)
         
-        # Regional spillover effects
-        features['regional_conflict'] = features.groupby('region')['fatalities'].transform('mean')
+        # Regional spillover effects: previous period's regional mean, so a row
+        # never sees its own target or later periods
+        if regional_means is None:
+            regional_means = data.groupby(['region', dates])['fatalities'].mean()
+        previous_means = regional_means.groupby(level=0).shift(1)
+        row_keys = pd.MultiIndex.from_arrays([data['region'], dates])
+        engineered['regional_conflict'] = pd.Series(
+            previous_means.reindex(row_keys).to_numpy(), index=data.index
+        ).fillna(0)
         
         # Temporal features
-        features['month'] = pd.to_datetime(features['date']).dt.month
-        features['year'] = pd.to_datetime(features['date']).dt.year
+        engineered['month'] = dates.dt.month
+        engineered['year'] = dates.dt.year
         
         # Economic stress indicators
-        if 'gdp_per_capita' in features.columns:
-            features['gdp_growth'] = features.groupby('country')['gdp_per_capita'].pct_change().fillna(0)
+        if 'gdp_per_capita' in data.columns:
+            engineered['gdp_growth'] = by_country['gdp_per_capita'].pct_change().fillna(0)
         
         # Political stability
-        if 'polity_score' in features.columns:
-            features['polity_change'] = features.groupby('country')['polity_score'].diff().fillna(0)
+        if 'polity_score' in data.columns:
+            engineered['polity_change'] = by_country['polity_score'].diff().fillna(0)
+        
+        # Neighbour-weighted conflict lags (borders, alliances, trade)
+        if self.spatial_weights is not None:
+            engineered.update(self._spatial_lag_features(data, dates, conflict_history))
+        
+        return engineered
+    
+    def set_spatial_weights(self, network_analyzer, countries=None, networks=('contiguity', 'alliance', 'trade')):
+        """
+        Enable neighbour-weighted conflict lag features
+        
+        For every network a feature ``<network>_conflict_lag`` is added: the
+        average previous-period fatalities of a country's neighbours in that
+        network (row-normalized edge weights). Training records the
+        fatality history of the indexed countries, so predictions for a
+        few countries still see the lags of neighbours they arrive without.
+        
+        Args:
+            network_analyzer (NetworkAnalyzer): Analyzer with loaded graphs
+            countries (list): Country index (default: all nodes in the networks)
+            networks (tuple): Networks to use ('contiguity', 'alliance', 'trade')
+        """
+        if countries is None:
+            nodes = set()
+            for network in networks:
+                nodes.update(getattr(network_analyzer, f"{network}_graph").nodes)
+            countries = sorted(nodes)
+        
+        # One stacked (n_networks * n_countries, n_countries) CSR matrix
+        stacked = sparse.vstack([
+            network_analyzer.to_sparse_adjacency(countries, network) for network in networks
+        ]).tocsr()
+        
+        self.spatial_weights = {
+            'countries': list(countries),
+            'names': [f"{network}_conflict_lag" for network in networks],
+            'matrix': stacked,
+            'history': None
+        }
+        
+        # Cached matrices were built without these features
+        self._feature_cache.clear()
+        self.logger.info(f"Spatial weights set for {len(countries)} countries and networks {list(networks)}")
+    
+    def _spatial_lag_features(self, data, dates, conflict_history=None):
+        """
+        Previous-period neighbour conflict for every row
+        
+        Fatalities are scattered into a dense (country, period) matrix and
+        all networks are applied with a single CSR x dense product. Cells
+        not covered by ``data`` (e.g. neighbours missing from a
+        single-country request) are filled from the recorded history.
+        
+        Args:
+            data (pd.DataFrame): Raw conflict data
+            dates (pd.Series): Parsed row dates
+            conflict_history (dict): (country, period) fatality history
+                (default: the one recorded at training time)
+            
+        Returns:
+            dict: Feature name -> pd.Series aligned with ``data``
+        """
+        weights = self.spatial_weights
+        history = weights.get('history') if conflict_history is None else conflict_history
+        n_countries = len(weights['countries'])
+        
+        country_codes = pd.Index(weights['countries']).get_indexer(data['country'])
+        known = country_codes >= 0
+        row_periods = dates.to_numpy()
+        period_values = np.unique(row_periods) if history is None else np.union1d(history['periods'], row_periods)
+        period_codes = np.searchsorted(period_values, row_periods)
+        n_periods = len(period_values)
+        
+        conflict = np.zeros((n_countries, n_periods), dtype=np.float64)
+        if history is not None:
+            conflict[:, np.searchsorted(period_values, history['periods'])] = history['conflict']
+        
+        # Cells present in the data override the history
+        fatalities = data['fatalities'].to_numpy(dtype=np.float64, na_value=0)
+        cells = country_codes[known] * n_periods + period_codes[known]
+        covered = np.bincount(cells, minlength=n_countries * n_periods) > 0
+        conflict.ravel()[covered] = np.bincount(
+            cells, weights=fatalities[known], minlength=n_countries * n_periods
+        )[covered]
+        
+        # (n_networks * n_countries, n_periods) neighbour averages
+        neighbour_conflict = weights['matrix'] @ conflict
+        
+        features = {}
+        has_lag = known & (period_codes > 0)
+        for k, name in enumerate(weights['names']):
+            values = np.zeros(len(data), dtype=np.float64)
+            values[has_lag] = neighbour_conflict[
+                k * n_countries + country_codes[has_lag], period_codes[has_lag] - 1
+            ]
+            features[name] = pd.Series(values, index=data.index)
         
         return features
     
+    def _conflict_history(self, country_period_sums):
+        """
+        Dense fatality history over the spatial country index
+        
+        Args:
+            country_period_sums (pd.Series): Fatalities indexed by (country, period)
+            
+        Returns:
+            dict: 'periods' (sorted datetime64) and 'conflict' (n_countries, n_periods)
+        """
+        period_values, period_codes = np.unique(
+            country_period_sums.index.get_level_values(1).to_numpy(), return_inverse=True
+        )
+        codes = pd.Index(self.spatial_weights['countries']).get_indexer(
+            country_period_sums.index.get_level_values(0)
+        )
+        known = codes >= 0
+        
+        conflict = np.zeros((len(self.spatial_weights['countries']), len(period_values)), dtype=np.float64)
+        np.add.at(conflict, (codes[known], period_codes[known]), country_period_sums.to_numpy()[known])
+        
+        return {'periods': period_values, 'conflict': conflict}
+    
+    @staticmethod
+    def _country_period_sums(data, dates=None):
+        """Fatalities summed per (country, period)"""
+        dates = pd.to_datetime(data['date']) if dates is None else dates
+        return data.groupby(['country', dates])['fatalities'].sum()
+    
+    def _record_spatial_history(self, history):
+        """
+        Keep the training fatality history for spatial lags at prediction time
+        
+        Args:
+            history (dict): History the training matrix was built with (see
+                ``_conflict_history``)
+        """
+        if self.spatial_weights is None:
+            return
+        self.spatial_weights['history'] = history
+    
+    def build_feature_matrix(self, data, feature_columns=None, target_column='fatalities', dtype=None,
+                             regional_means=None, conflict_history=None):
+        """
+        Build a C-contiguous feature matrix straight from the raw data
+        
+        Engineered and raw columns are written column by column into one
+        preallocated array, so no intermediate feature DataFrame is built.
+        Missing values are filled with 0, as in ``prepare_features``.
+        
+        Args:
+            data (pd.DataFrame): Raw conflict data
+            feature_columns (list): Columns to extract (default: all numeric
+                non-identifier columns, in ``prepare_features`` order)
+            target_column (str): Target column excluded from the defaults
+            dtype: Matrix dtype (default: ``self.feature_dtype``)
+            regional_means (pd.Series): Optional (region, period) fatality
+                means for the regional feature (see ``_engineer_features``)
+            conflict_history (dict): Optional fatality history for the
+                spatial lags (see ``_engineer_features``)
+            
+        Returns:
+            tuple: (np.ndarray feature matrix, list of feature columns)
+        """
+        dtype = np.dtype(dtype or self.feature_dtype)
+        engineered = self._engineer_features(data, regional_means, conflict_history)
+        
+        def column(name):
+            return engineered[name] if name in engineered else data[name]
+        
+        if feature_columns is None:
+            names = list(data.columns) + [name for name in engineered if name not in data.columns]
+            exclude_columns = [target_column, 'country', 'region', 'date']
+            feature_columns = [
+                name for name in names
+                if name not in exclude_columns
+                and pd.api.types.is_numeric_dtype(column(name))
+                and not pd.api.types.is_bool_dtype(column(name))
+            ]
+        
+        X = np.zeros((len(data), len(feature_columns)), dtype=dtype, order='C')
+        for j, name in enumerate(feature_columns):
+            if name in engineered or name in data.columns:
+                X[:, j] = column(name).to_numpy(dtype=dtype, na_value=0)
+        
+        return X, list(feature_columns)
+    
     def train(self, data, target_column='fatalities', test_size=0.2):
         """
         Train the event prediction model
@@ -82,16 +420,11 @@ class EventPredictor:
         """
         self.logger.info("Starting model training...")
         
-        # Prepare features
-        features = self.prepare_features(data)
-        
-        # Select feature columns (exclude non-numeric and target)
-        numeric_columns = features.select_dtypes(include=[np.number]).columns
-        exclude_columns = [target_column, 'country', 'region', 'date']
-        self.feature_columns = [col for col in numeric_columns if col not in exclude_columns]
-        
-        X = features[self.feature_columns].fillna(0)
-        y = features[target_column].fillna(0)
+        # Prepare features (cached per dataset)
+        matrix = self._get_feature_matrix(data, target_column)
+        self.feature_columns = matrix['feature_columns']
+        X = matrix['X']
+        y = matrix['y']
         
         # Split data
         X_train, X_test, y_train, y_test = train_test_split(
@@ -99,34 +432,662 @@ class EventPredictor:
         )
         
         # Initialize model
-        if self.model_type == 'gradient_boosting':
-            self.model = GradientBoostingRegressor(
-                n_estimators=100,
-                learning_rate=0.1,
-                max_depth=6,
-                random_state=42
-            )
+        self.model = self._build_model()
         
         # Train model
         self.model.fit(X_train, y_train)
-        self.is_trained = True
+        self._mark_trained(matrix['fingerprint'])
+        self._record_spatial_history(matrix['conflict_history'])
         
         # Evaluate
         y_pred = self.model.predict(X_test)
         mse = mean_squared_error(y_test, y_pred)
         r2 = r2_score(y_test, y_pred)
         
+        self.baseline_rmse = float(np.sqrt(mse))
+        self.last_trained_period = matrix['periods'].max()
+        self.updates_since_full_fit = 0
+        
         metrics = {
             'mse': mse,
             'rmse': np.sqrt(mse),
             'r2': r2,
-            'feature_importance': dict(zip(self.feature_columns, self.model.feature_importances_))
+            'feature_importance': dict(zip(self.feature_columns, self._feature_importances()))
         }
         
         self.logger.info(f"Training completed. R² Score: {r2:.3f}, RMSE: {np.sqrt(mse):.3f}")
         
         return metrics
     
+    def tune(self, data, target_column='fatalities', param_grid=None, factor=3,
+             cv_splits=3, n_jobs=-1, save_path=None):
+        """
+        Tune hyperparameters with successive halving and keep the best model
+        
+        Candidates are evaluated on growing training-set sizes: each round
+        keeps the best ``1/factor`` of the configurations and gives them
+        ``factor`` times more samples, so poor configurations are dropped
+        early. Rounds are evaluated in parallel worker processes with
+        time-ordered cross-validation on the cached feature matrix.
+        
+        Args:
+            data (pd.DataFrame): Training data
+            target_column (str): Target variable column name
+            param_grid (dict): Search space (default: ``self.param_grid``)
+            factor (int): Halving factor between rounds
+            cv_splits (int): Number of time-series CV splits
+            n_jobs (int): Number of worker processes (-1 uses all cores)
+            save_path (str): Optional path to persist the best model; the
+                report is written next to it as JSON
+            
+        Returns:
+            dict: Best parameters, scores per round and timing
+        """
+        self.logger.info("Starting successive halving hyperparameter search...")
+        start = time.perf_counter()
+        
+        matrix = self._get_feature_matrix(data, target_column)
+        
+        # Time-ordered rows so CV folds always validate on later periods
+        order = np.argsort(matrix['periods'].to_numpy(), kind='stable')
+        X = matrix['X'][order]
+        y = matrix['y'][order]
+        
+        search = HalvingGridSearchCV(
+            self._build_model(),
+            param_grid or self.param_grid,
+            factor=factor,
+            resource='n_samples',
+            cv=TimeSeriesSplit(n_splits=cv_splits),
+            scoring='neg_root_mean_squared_error',
+            n_jobs=n_jobs,
+            random_state=self.model_params.get('random_state'),
+            refit=True
+        )
+        search.fit(X, y)
+        
+        # Keep the refitted best model
+        self.feature_columns = matrix['feature_columns']
+        self.model_params.update(search.best_params_)
+        self.model = search.best_estimator_
+        self.baseline_rmse = float(-search.best_score_)
+        self.last_trained_period = matrix['periods'].max()
+        self.updates_since_full_fit = 0
+        self._mark_trained(matrix['fingerprint'])
+        self._record_spatial_history(matrix['conflict_history'])
+        
+        results = search.cv_results_
+        rounds = []
+        for i in range(search.n_iterations_):
+            in_round = results['iter'] == i
+            rounds.append({
+                'round': i,
+                'n_candidates': int(search.n_candidates_[i]),
+                'n_samples': int(search.n_resources_[i]),
+                'best_rmse': float(-results['mean_test_score'][in_round].max()),
+                'fit_seconds': float(results['mean_fit_time'][in_round].sum() * cv_splits)
+            })
+        
+        report = {
+            'best_params': search.best_params_,
+            'best_rmse': self.baseline_rmse,
+            'n_candidates': int(search.n_candidates_[0]),
+            'rounds': rounds,
+            'refit_seconds': float(search.refit_time_),
+            'wall_seconds': time.perf_counter() - start,
+            'model_version': self.model_version
+        }
+        
+        if save_path:
+            self.save_model(save_path)
+            with open(f"{save_path}.report.json", 'w') as f:
+                json.dump(report, f, indent=2, default=str)
+        
+        self.logger.info(
+            f"Tuning completed. Best RMSE: {report['best_rmse']:.3f} with {report['best_params']}"
+        )
+        
+        return report
+    
+    def build_horizon_targets(self, data, horizons=None, target_column='fatalities'):
+        """
+        Build future targets for several horizons in one pass
+        
+        Rows must be ordered by date within each country (as for the lagged
+        features). Targets beyond the end of a country's history are NaN.
+        
+        Args:
+            data (pd.DataFrame): Raw conflict data
+            horizons (tuple): Months ahead (default: ``self.horizons``)
+            target_column (str): Target variable column name
+            
+        Returns:
+            np.ndarray: Targets of shape (n_rows, n_horizons)
+        """
+        horizons = tuple(horizons or self.horizons)
+        by_country = data.groupby('country')[target_column]
+        
+        targets = np.empty((len(data), len(horizons)), dtype=np.float64)
+        for j, horizon in enumerate(horizons):
+            targets[:, j] = by_country.shift(-horizon).to_numpy(dtype=np.float64, na_value=np.nan)
+        
+        return targets
+    
+    def train_multi_horizon(self, data, horizons=None, target_column='fatalities',
+                            test_size=0.2, n_jobs=-1):
+        """
+        Train one forecast model per horizon on a shared feature matrix
+        
+        The feature matrix is built once and the horizon models are fitted
+        in parallel worker processes. Each horizon is evaluated on the last
+        ``test_size`` share of periods; its training rows end ``horizon``
+        periods before them so no training target lies in the test periods.
+        
+        Args:
+            data (pd.DataFrame): Training data
+            horizons (tuple): Months ahead (default: ``self.horizons``)
+            target_column (str): Target variable column name
+            test_size (float): Share of the latest periods held out
+            n_jobs (int): Number of worker processes (-1 uses all cores)
+            
+        Returns:
+            dict: Metrics per horizon
+        """
+        horizons = tuple(horizons or self.horizons)
+        self.logger.info(f"Training multi-horizon models for horizons {horizons}...")
+        start = time.perf_counter()
+        
+        matrix = self._get_feature_matrix(data, target_column)
+        targets = self.build_horizon_targets(data, horizons, target_column)
+        
+        # Time-based holdout on the latest periods
+        unique_periods, period_codes = np.unique(matrix['periods'].to_numpy(), return_inverse=True)
+        cutoff = int(np.floor(len(unique_periods) * (1 - test_size))) - 1
+        
+        jobs = []
+        for j, horizon in enumerate(horizons):
+            known = ~np.isnan(targets[:, j])
+            # Purge the last ``horizon`` training periods: their targets fall in the test periods
+            jobs.append((
+                np.flatnonzero(known & (period_codes <= cutoff - horizon)),
+                np.flatnonzero(known & (period_codes > cutoff))
+            ))
+        
+        base_model = self._build_model()
+        fitted = Parallel(n_jobs=n_jobs)(
+            delayed(_fit_horizon)(clone(base_model), matrix['X'], targets[:, j], train_idx, test_idx)
+            for j, (train_idx, test_idx) in enumerate(jobs)
+        )
+        
+        self.horizon_feature_columns = matrix['feature_columns']
+        self._record_spatial_history(matrix['conflict_history'])
+        self.horizons = horizons
+        self.horizon_models = {}
+        metrics = {}
+        for horizon, (train_idx, test_idx), (model, rmse, seconds) in zip(horizons, jobs, fitted):
+            self.horizon_models[horizon] = model
+            metrics[horizon] = {
+                'rmse': rmse,
+                'n_train': len(train_idx),
+                'n_test': len(test_idx),
+                'fit_seconds': seconds
+            }
+        
+        self.logger.info(f"Multi-horizon training completed in {time.perf_counter() - start:.1f}s")
+        
+        return {'horizons': metrics, 'wall_seconds': time.perf_counter() - start}
+    
+    def predict_horizons(self, data):
+        """
+        Forecast every horizon for the latest period of each country
+        
+        Args:
+            data (pd.DataFrame): Recent history for the countries to forecast
+            
+        Returns:
+            pd.DataFrame: Predictions indexed by country, one column per
+                horizon (e.g. '1m', '3m', '6m')
+        """
+        if not self.horizon_models:
+            raise ValueError("Multi-horizon models must be trained first")
+        
+        X, _ = self.build_feature_matrix(data, self.horizon_feature_columns)
+        
+        # Positional index of the latest row of each country
+        positions = pd.Series(np.arange(len(data)), index=data.index)
+        latest = positions.groupby(data['country'].to_numpy()).last()
+        X_latest = X[latest.to_numpy()]
+        
+        predictions = np.empty((len(latest), len(self.horizon_models)), dtype=np.float64)
+        for j, (horizon, model) in enumerate(sorted(self.horizon_models.items())):
+            predictions[:, j] = model.predict(X_latest)
+        
+        return pd.DataFrame(
+            predictions,
+            index=pd.Index(latest.index, name='country'),
+            columns=[f"{horizon}m" for horizon in sorted(self.horizon_models)]
+        )
+    
+    def check_precision_parity(self, data, target_column='fatalities', test_size=0.2):
+        """
+        Compare the float32 feature path against float64
+        
+        Fits the configured model on both matrix types with the same split
+        and reports the prediction differences and the memory of each
+        feature matrix.
+        
+        Args:
+            data (pd.DataFrame): Training data
+            target_column (str): Target variable column name
+            test_size (float): Proportion of data for evaluation
+            
+        Returns:
+            dict: Max/mean absolute prediction difference, RMSE per dtype
+                and feature matrix size in bytes
+        """
+        y = data[target_column].to_numpy(dtype=np.float64, na_value=0)
+        train_idx, test_idx = train_test_split(np.arange(len(data)), test_size=test_size, random_state=42)
+        
+        conflict_history = None
+        if self.spatial_weights is not None:
+            conflict_history = self._conflict_history(self._country_period_sums(data))
+        
+        results = {}
+        for dtype in (np.float32, np.float64):
+            X, _ = self.build_feature_matrix(data, target_column=target_column, dtype=dtype,
+                                             conflict_history=conflict_history)
+            model = self._build_model().fit(X[train_idx], y[train_idx])
+            predictions = model.predict(X[test_idx])
+            results[np.dtype(dtype).name] = {
+                'predictions': predictions,
+                'rmse': float(np.sqrt(mean_squared_error(y[test_idx], predictions))),
+                'nbytes': int(X.nbytes)
+            }
+        
+        difference = np.abs(results['float32']['predictions'] - results['float64']['predictions'])
+        
+        return {
+            'max_abs_diff': float(difference.max()),
+            'mean_abs_diff': float(difference.mean()),
+            'rmse_float32': results['float32']['rmse'],
+            'rmse_float64': results['float64']['rmse'],
+            'nbytes_float32': results['float32']['nbytes'],
+            'nbytes_float64': results['float64']['nbytes']
+        }
+    
+    def update(self, data, target_column='fatalities', drift_threshold=1.5,
+               n_new_estimators=20, recent_periods=12, full_retrain_every=None):
+        """
+        Incrementally update the trained model with newly appended periods
+        
+        Residuals on the periods after the last training cut-off decide the
+        update strategy: if their RMSE stays within ``drift_threshold`` times
+        the training RMSE, new trees are added to the existing ensemble
+        (warm start); otherwise the model is refitted on the most recent
+        periods only. Either way the drift baseline becomes the updated
+        model's RMSE on the window's last period, held out from a probe fit.
+        Every ``full_retrain_every`` updates a full retrain is performed
+        instead.
+        
+        Args:
+            data (pd.DataFrame): Full history including the new periods
+            target_column (str): Target variable column name
+            drift_threshold (float): Max ratio of new RMSE to training RMSE
+                that still allows a warm-start update
+            n_new_estimators (int): Trees added per warm-start update
+            recent_periods (int): Periods used for warm-start and refits
+            full_retrain_every (int): Force a full retrain after this many
+                incremental updates (None disables)
+            
+        Returns:
+            dict: Update summary
+        """
+        if not self.is_trained:
+            raise ValueError("Model must be trained before it can be updated")
+        if isinstance(self.model, FlatTreeEnsemble):
+            raise ValueError("Models loaded from artifacts are read-only; run a full train")
+        if not isinstance(self.model, GradientBoostingRegressor):
+            raise ValueError("Incremental updates require a gradient boosting model")
+        
+        start = time.perf_counter()
+        
+        if full_retrain_every and self.updates_since_full_fit + 1 >= full_retrain_every:
+            self.logger.info("Scheduled checkpoint reached, running full retrain...")
+            metrics = self.train(data, target_column=target_column)
+            return {
+                'mode': 'full_retrain',
+                'rmse': float(metrics['rmse']),
+                'seconds': time.perf_counter() - start
+            }
+        
+        matrix = self._get_feature_matrix(data, target_column)
+        if matrix['feature_columns'] != self.feature_columns:
+            raise ValueError("Feature columns changed since training; run a full train")
+        
+        periods = matrix['periods']
+        new_mask = (periods > self.last_trained_period).to_numpy()
+        if not new_mask.any():
+            return {'mode': 'none', 'new_rows': 0, 'seconds': time.perf_counter() - start}
+        
+        X = matrix['X']
+        y = matrix['y']
+        
+        # Drift check on the residuals of the new periods
+        residuals = y[new_mask] - self.model.predict(X[new_mask])
+        new_rmse = float(np.sqrt(np.mean(np.square(residuals))))
+        drift_ratio = new_rmse / max(self.baseline_rmse or 0.0, 1e-9)
+        
+        # Training window: the most recent periods (including the new ones)
+        recent_cutoff = np.sort(periods.unique())[-recent_periods:][0]
+        recent_mask = (periods >= recent_cutoff).to_numpy()
+        
+        # The window's last period is held out to measure the updated model's error
+        holdout_mask = (periods == periods.max()).to_numpy()
+        fit_mask = recent_mask & ~holdout_mask
+        
+        if drift_ratio <= drift_threshold:
+            mode = 'warm_start'
+            self.model.set_params(
+                warm_start=True,
+                n_estimators=self.model.n_estimators_ + n_new_estimators
+            )
+        else:
+            mode = 'recent_refit'
+            self.model = self._build_model()
+        
+        holdout_rmse = self._holdout_rmse(self.model, X, y, fit_mask, holdout_mask)
+        if holdout_rmse is not None:
+            self.baseline_rmse = holdout_rmse
+        self.model.fit(X[recent_mask], y[recent_mask])
+        
+        self.last_trained_period = periods.max()
+        self.updates_since_full_fit += 1
+        self._mark_trained(matrix['fingerprint'])
+        self._record_spatial_history(matrix['conflict_history'])
+        
+        summary = {
+            'mode': mode,
+            'new_rows': int(new_mask.sum()),
+            'new_rmse': new_rmse,
+            'drift_ratio': drift_ratio,
+            'baseline_rmse': self.baseline_rmse,
+            'n_estimators': int(self.model.n_estimators_),
+            'seconds': time.perf_counter() - start
+        }
+        
+        self.logger.info(
+            f"Model updated ({mode}). Drift ratio: {drift_ratio:.2f}, "
+            f"{summary['n_estimators']} trees"
+        )
+        
+        return summary
+    
+    @staticmethod
+    def _holdout_rmse(model, X, y, fit_mask, holdout_mask):
+        """
+        RMSE on held-out rows of a copy of ``model`` fitted on ``fit_mask``
+        
+        Args:
+            model: Estimator in the state it will be fitted from (fresh or warm start)
+            X (np.ndarray): Feature matrix
+            y (np.ndarray): Targets
+            fit_mask (np.ndarray): Rows to fit on
+            holdout_mask (np.ndarray): Rows to score
+            
+        Returns:
+            float: Held-out RMSE (None if either slice is empty)
+        """
+        if not fit_mask.any() or not holdout_mask.any():
+            return None
+        
+        probe = copy.deepcopy(model).fit(X[fit_mask], y[fit_mask])
+        return float(np.sqrt(mean_squared_error(y[holdout_mask], probe.predict(X[holdout_mask]))))
+    
+    @staticmethod
+    def iter_partitions(source, chunksize=None):
+        """
+        Lazily read a partitioned dataset one chunk at a time
+        
+        Rows must be ordered by date within each country. A country's
+        history may span several chunks (``chunksize``) or files:
+        ``train_streaming`` carries the last rows of every country into the
+        next chunk before computing lagged features.
+        
+        Args:
+            source (str): Directory of CSV/Parquet partitions or a glob pattern
+            chunksize (int): Optional rows per chunk when reading CSV files
+            
+        Yields:
+            pd.DataFrame: Raw data chunks
+        """
+        if os.path.isdir(source):
+            paths = sorted(
+                glob.glob(os.path.join(source, '*.csv')) +
+                glob.glob(os.path.join(source, '*.parquet'))
+            )
+        else:
+            paths = sorted(glob.glob(source))
+        
+        for path in paths:
+            if path.endswith('.parquet'):
+                yield pd.read_parquet(path)
+            elif chunksize:
+                yield from pd.read_csv(path, chunksize=chunksize)
+            else:
+                yield pd.read_csv(path)
+    
+    def train_streaming(self, chunk_source, target_column='fatalities', n_epochs=1, chunksize=None):
+        """
+        Train an incremental linear model without materializing the dataset
+        
+        A first pass collects per-(region, period) fatality sums so the
+        regional feature uses the same dataset-wide lagged means as a batch
+        build; a second pass computes feature means and scales with a
+        streaming ``StandardScaler``; each following epoch feeds the scaled
+        chunks to ``SGDRegressor.partial_fit``. Only one chunk (plus the
+        last two rows per country, for the lags) is held in memory at a
+        time, so peak memory depends on the chunk size, not the dataset
+        size.
+        
+        Args:
+            chunk_source: Partition directory/glob (see ``iter_partitions``)
+                or a callable returning a fresh iterator of DataFrame chunks
+            target_column (str): Target variable column name
+            n_epochs (int): Passes over the data for the regressor
+            chunksize (int): Rows per chunk when reading CSV partitions
+            
+        Returns:
+            dict: Training metrics (progressive validation on the last epoch;
+                rows seen before the regressor's first update are not scored)
+        """
+        if n_epochs < 1:
+            raise ValueError(f"n_epochs must be at least 1, got {n_epochs}")
+        
+        self.logger.info("Starting streaming model training...")
+        
+        if callable(chunk_source):
+            make_chunks = chunk_source
+        else:
+            def make_chunks():
+                return self.iter_partitions(chunk_source, chunksize=chunksize)
+        
+        # Pass 1: dataset-wide regional and country sums, fingerprint and row count
+        regional_sums = []
+        country_sums = []
+        fingerprint = hashlib.sha1()
+        last_period = None
+        n_rows = 0
+        
+        for chunk in make_chunks():
+            dates = pd.to_datetime(chunk['date'])
+            regional_sums.append(chunk.groupby(['region', dates])['fatalities'].agg(['sum', 'count']))
+            if self.spatial_weights is not None:
+                country_sums.append(self._country_period_sums(chunk, dates))
+            fingerprint.update(self._data_fingerprint(chunk).encode())
+            chunk_last = dates.max()
+            last_period = chunk_last if last_period is None else max(last_period, chunk_last)
+            n_rows += len(chunk)
+        
+        if n_rows == 0:
+            raise ValueError("No data received from chunk source")
+        
+        totals = pd.concat(regional_sums).groupby(level=[0, 1]).sum()
+        regional_means = totals['sum'] / totals['count'].where(totals['count'] > 0)
+        conflict_history = None
+        if country_sums:
+            conflict_history = self._conflict_history(pd.concat(country_sums).groupby(level=[0, 1]).sum())
+        feature_columns = None
+        
+        def feature_chunks():
+            nonlocal feature_columns
+            # The last rows of every country seen so far are prepended to the
+            # next chunk, so lags and changes continue across chunk boundaries
+            carry = None
+            for chunk in make_chunks():
+                context = chunk if carry is None else pd.concat([carry, chunk], ignore_index=True)
+                X, feature_columns = self.build_feature_matrix(
+                    context, feature_columns, target_column=target_column,
+                    regional_means=regional_means, conflict_history=conflict_history
+                )
+                carry = context.groupby('country').tail(2)
+                y = chunk[target_column].to_numpy(dtype=np.float64, na_value=0)
+                yield X[len(context) - len(chunk):], y
+        
+        # Pass 2: bounded-memory feature means and scales
+        scaler = StandardScaler()
+        for X, _ in feature_chunks():
+            scaler.partial_fit(X)
+        
+        # Remaining passes: incremental regression on scaled chunks
+        regressor = SGDRegressor(**self.sgd_params)
+        for epoch in range(n_epochs):
+            squared_error = 0.0
+            n_scored = 0
+            for X, y in feature_chunks():
+                X_scaled = scaler.transform(X)
+                
+                # Progressive validation: score each chunk before learning from it
+                if epoch == n_epochs - 1 and hasattr(regressor, 'coef_'):
+                    squared_error += float(np.sum(np.square(y - regressor.predict(X_scaled))))
+                    n_scored += len(y)
+                
+                regressor.partial_fit(X_scaled, y)
+        
+        self.model_type = 'sgd'
+        self.model = Pipeline([('scaler', scaler), ('regressor', regressor)])
+        self.feature_columns = feature_columns
+        self.baseline_rmse = float(np.sqrt(squared_error / n_scored)) if n_scored else None
+        self.last_trained_period = last_period
+        self.updates_since_full_fit = 0
+        self._mark_trained(fingerprint.hexdigest())
+        self._record_spatial_history(conflict_history)
+        
+        metrics = {
+            'rmse': self.baseline_rmse if n_scored else float('nan'),
+            'n_rows': n_rows,
+            'n_scored': n_scored,
+            'n_epochs': n_epochs,
+            'feature_importance': dict(zip(self.feature_columns, self._feature_importances()))
+        }
+        
+        self.logger.info(f"Streaming training completed on {n_rows} rows. RMSE: {metrics['rmse']:.3f}")
+        
+        return metrics
+    
+    def backtest(self, data, target_column='fatalities', n_windows=5,
+                 window_type='expanding', window_size=None, test_periods=None,
+                 n_jobs=-1):
+        """
+        Walk-forward backtest on time-ordered windows
+        
+        Each window trains on past periods only and is evaluated on the
+        periods that immediately follow it. Windows are fitted in parallel
+        worker processes over one shared feature matrix.
+        
+        Args:
+            data (pd.DataFrame): Historical data with a 'date' column
+            target_column (str): Target variable column name
+            n_windows (int): Number of walk-forward windows
+            window_type (str): 'expanding' or 'rolling' training windows
+            window_size (int): Training periods per window (rolling only)
+            test_periods (int): Periods evaluated per window (default: auto)
+            n_jobs (int): Number of worker processes (-1 uses all cores)
+            
+        Returns:
+            dict: Per-window RMSE/R² and compute time
+        """
+        if window_type not in ('expanding', 'rolling'):
+            raise ValueError(f"Unknown window_type: {window_type}")
+        if window_type == 'rolling' and not window_size:
+            raise ValueError("window_size is required for rolling windows")
+        
+        start = time.perf_counter()
+        matrix = self._get_feature_matrix(data, target_column)
+        X = matrix['X']
+        y = matrix['y']
+        
+        # Split on unique periods so a period never straddles train and test
+        unique_periods, period_codes = np.unique(matrix['periods'].to_numpy(), return_inverse=True)
+        splitter = TimeSeriesSplit(
+            n_splits=n_windows,
+            max_train_size=window_size if window_type == 'rolling' else None,
+            test_size=test_periods
+        )
+        
+        windows = []
+        for train_periods, test_periods_idx in splitter.split(unique_periods):
+            train_idx = np.flatnonzero(
+                (period_codes >= train_periods[0]) & (period_codes <= train_periods[-1])
+            )
+            test_idx = np.flatnonzero(
+                (period_codes >= test_periods_idx[0]) & (period_codes <= test_periods_idx[-1])
+            )
+            windows.append({
+                'train_start': str(unique_periods[train_periods[0]])[:10],
+                'train_end': str(unique_periods[train_periods[-1]])[:10],
+                'test_start': str(unique_periods[test_periods_idx[0]])[:10],
+                'test_end': str(unique_periods[test_periods_idx[-1]])[:10],
+                'n_train': len(train_idx),
+                'n_test': len(test_idx),
+                'train_idx': train_idx,
+                'test_idx': test_idx
+            })
+        
+        self.logger.info(f"Running {len(windows)} {window_type} backtest windows...")
+        
+        base_model = self._build_model()
+        scores = Parallel(n_jobs=n_jobs)(
+            delayed(_fit_window)(clone(base_model), X, y, w['train_idx'], w['test_idx'])
+            for w in windows
+        )
+        
+        results = []
+        for i, (window, score) in enumerate(zip(windows, scores)):
+            window.pop('train_idx')
+            window.pop('test_idx')
+            results.append({'window': i, **window, **score})
+        
+        rmse = np.array([r['rmse'] for r in results])
+        r2 = np.array([r['r2'] for r in results])
+        
+        report = {
+            'window_type': window_type,
+            'n_windows': len(results),
+            'windows': results,
+            'mean_rmse': float(rmse.mean()),
+            'std_rmse': float(rmse.std()),
+            'mean_r2': float(np.nanmean(r2)) if not np.isnan(r2).all() else float('nan'),
+            'compute_seconds': float(sum(r['compute_seconds'] for r in results)),
+            'wall_seconds': time.perf_counter() - start
+        }
+        
+        self.logger.info(
+            f"Backtest completed. Mean RMSE: {report['mean_rmse']:.3f}, "
+            f"wall time: {report['wall_seconds']:.1f}s"
+        )
+        
+        return report
+    
     def predict(self, data):
         """
         Make predictions on new data
@@ -140,12 +1101,98 @@ class EventPredictor:
         if not self.is_trained:
             raise ValueError("Model must be trained before making predictions")
         
-        features = self.prepare_features(data)
-        X = features[self.feature_columns].fillna(0)
+        X, _ = self.build_feature_matrix(data, self.feature_columns)
+        
+        if self.prediction_cache is None:
+            return self.predict_matrix(X)
+        
+        # Serve repeated rows from the cache, keyed by feature fingerprint
+        self.prediction_cache.ensure_version(self.model_version)
+        row_hashes = pd.util.hash_pandas_object(pd.DataFrame(X, copy=False), index=False)
+        keys = row_hashes.to_numpy().view(np.int64).tolist()
+        cached = self.prediction_cache.get_many(keys)
+        
+        predictions = np.array([np.nan if value is None else value for value in cached], dtype=np.float64)
+        missing = np.flatnonzero(np.isnan(predictions))
+        if len(missing):
+            predictions[missing] = self.predict_matrix(X[missing])
+            self.prediction_cache.put_many([keys[i] for i in missing], predictions[missing].tolist())
         
-        predictions = self.model.predict(X)
         return predictions
     
+    def enable_prediction_cache(self, max_entries=100000, cache_path=None):
+        """
+        Cache predictions per row in front of ``predict``/``predict_risk_level``
+        
+        Rows are keyed by a hash of their feature values; the cache is bound
+        to the model version, so retraining or loading another model
+        invalidates all entries automatically.
+        
+        Args:
+            max_entries (int): Maximum rows kept in memory (LRU)
+            cache_path (str): Optional SQLite file for an on-disk cache
+        """
+        if self.prediction_cache is not None:
+            self.prediction_cache.close()
+        self.prediction_cache = ResultCache(max_entries=max_entries, cache_path=cache_path)
+    
+    def get_cache_stats(self):
+        """Prediction cache hit/miss counters (None if caching is disabled)"""
+        return self.prediction_cache.stats() if self.prediction_cache is not None else None
+    
+    def predict_matrix(self, X):
+        """
+        Predict from an already built feature matrix
+        
+        Small batches (up to ``compiled_batch_size`` rows) are evaluated with
+        the compiled array-based trees, which skip sklearn's per-call input
+        validation; larger batches use the model's own ``predict``. Both
+        paths give identical predictions.
+        
+        Args:
+            X: Feature matrix with columns in ``feature_columns`` order
+            
+        Returns:
+            np.array: Predictions
+        """
+        if not self.is_trained:
+            raise ValueError("Model must be trained before making predictions")
+        
+        if len(X) <= self.compiled_batch_size:
+            compiled = self.compile_model()
+            if compiled is not None:
+                return compiled.predict_compiled(X)
+        
+        if isinstance(self.model, Pipeline):
+            # Streaming models are fitted on plain arrays
+            X = np.asarray(X, dtype=self.feature_dtype)
+        elif isinstance(X, np.ndarray) and hasattr(self.model, 'feature_names_in_'):
+            X = pd.DataFrame(X, columns=self.feature_columns, copy=False)
+        
+        return self.model.predict(X)
+    
+    def compile_model(self):
+        """
+        Flatten the trained trees into contiguous arrays for fast inference
+        
+        The compiled ensemble is built once per model version.
+        
+        Returns:
+            FlatTreeEnsemble: Compiled ensemble (None for non-tree models)
+        """
+        if self._compiled_model is not None and self._compiled_model[0] == self.model_version:
+            return self._compiled_model[1]
+        
+        if isinstance(self.model, FlatTreeEnsemble):
+            ensemble = self.model
+        elif isinstance(self.model, GradientBoostingRegressor):
+            ensemble = FlatTreeEnsemble.from_gradient_boosting(self.model)
+        else:
+            return None
+        
+        self._compiled_model = (self.model_version, ensemble.compile())
+        return ensemble
+    
     def predict_risk_level(self, data):
         """
         Predict risk levels (Low, Medium, High, Critical)
@@ -173,13 +1220,20 @@ class EventPredictor:
     
     def save_model(self, filepath):
         """Save trained model to file"""
-        if not self.is_trained:
+        if not self.is_trained and not self.horizon_models:
             raise ValueError("No trained model to save")
         
         model_data = {
             'model': self.model,
             'feature_columns': self.feature_columns,
-            'model_type': self.model_type
+            'model_type': self.model_type,
+            'model_version': self.model_version,
+            'data_fingerprint': self.data_fingerprint,
+            'baseline_rmse': self.baseline_rmse,
+            'last_trained_period': self.last_trained_period,
+            'horizon_models': self.horizon_models,
+            'horizon_feature_columns': self.horizon_feature_columns,
+            'spatial_weights': self.spatial_weights
         }
         
         joblib.dump(model_data, filepath)
@@ -192,10 +1246,165 @@ class EventPredictor:
         self.model = model_data['model']
         self.feature_columns = model_data['feature_columns']
         self.model_type = model_data['model_type']
-        self.is_trained = True
+        self.model_version = model_data.get('model_version') or uuid.uuid4().hex[:12]
+        self.data_fingerprint = model_data.get('data_fingerprint')
+        self.baseline_rmse = model_data.get('baseline_rmse')
+        self.last_trained_period = model_data.get('last_trained_period')
+        self.horizon_models = model_data.get('horizon_models', {})
+        self.horizon_feature_columns = model_data.get('horizon_feature_columns')
+        self.spatial_weights = model_data.get('spatial_weights')
+        self._feature_cache.clear()
+        self.horizons = tuple(sorted(self.horizon_models)) or self.horizons
+        self.updates_since_full_fit = 0
+        self.is_trained = self.model is not None
         
         self.logger.info(f"Model loaded from {filepath}")
     
+    def save_artifact(self, directory):
+        """
+        Save the trained model as a memory-mappable artifact directory
+        
+        Tree arrays are written as uncompressed .npy files next to a small
+        metadata.json header, so worker processes can open them with
+        ``mmap_mode='r'`` and share one page-cached copy.
+        
+        Args:
+            directory (str): Artifact directory
+        """
+        if not self.is_trained:
+            raise ValueError("No trained model to save")
+        
+        if isinstance(self.model, FlatTreeEnsemble):
+            ensemble = self.model
+        elif isinstance(self.model, GradientBoostingRegressor):
+            ensemble = FlatTreeEnsemble.from_gradient_boosting(self.model)
+        else:
+            raise ValueError(f"Artifacts are not supported for {type(self.model).__name__}")
+        
+        ensemble.save(directory, metadata={
+            'feature_columns': self.feature_columns,
+            'model_type': self.model_type,
+            'model_version': self.model_version,
+            'data_fingerprint': self.data_fingerprint,
+            'baseline_rmse': self.baseline_rmse,
+            'last_trained_period': str(self.last_trained_period) if self.last_trained_period is not None else None,
+            'spatial_countries': self.spatial_weights['countries'] if self.spatial_weights else None,
+            'spatial_names': self.spatial_weights['names'] if self.spatial_weights else None
+        })
+        if self.spatial_weights is not None:
+            sparse.save_npz(os.path.join(directory, 'spatial_weights.npz'), self.spatial_weights['matrix'])
+            if self.spatial_weights.get('history') is not None:
+                np.savez(os.path.join(directory, 'spatial_history.npz'), **self.spatial_weights['history'])
+        self.logger.info(f"Model artifact saved to {directory}")
+    
+    def load_artifact(self, directory, mmap_mode='r'):
+        """
+        Load a model artifact saved with ``save_artifact``
+        
+        Args:
+            directory (str): Artifact directory
+            mmap_mode (str): numpy mmap mode ('r' shares memory between
+                processes, None reads the arrays into memory)
+        """
+        self.model, metadata = FlatTreeEnsemble.load(directory, mmap_mode=mmap_mode)
+        
+        self.feature_columns = metadata['feature_columns']
+        self.model_type = metadata['model_type']
+        self.model_version = metadata.get('model_version')
+        self.data_fingerprint = metadata.get('data_fingerprint')
+        self.baseline_rmse = metadata.get('baseline_rmse')
+        last_period = metadata.get('last_trained_period')
+        self.last_trained_period = pd.Timestamp(last_period) if last_period else None
+        
+        self.spatial_weights = None
+        if metadata.get('spatial_names'):
+            self.spatial_weights = {
+                'countries': metadata['spatial_countries'],
+                'names': metadata['spatial_names'],
+                'matrix': sparse.load_npz(os.path.join(directory, 'spatial_weights.npz')).tocsr(),
+                'history': None
+            }
+            history_path = os.path.join(directory, 'spatial_history.npz')
+            if os.path.exists(history_path):
+                with np.load(history_path) as history:
+                    self.spatial_weights['history'] = {
+                        'periods': history['periods'], 'conflict': history['conflict']
+                    }
+        self._feature_cache.clear()
+        self.is_trained = True
+        
+        self.logger.info(f"Model artifact loaded from {directory}")
+    
+    def _mark_trained(self, data_fingerprint):
+        """Record that a new model has been fitted"""
+        self.is_trained = True
+        self.data_fingerprint = data_fingerprint
+        self.model_version = uuid.uuid4().hex[:12]
+        
+        if self.prediction_cache is not None:
+            self.prediction_cache.ensure_version(self.model_version)
+    
+    def _build_model(self):
+        """Create an unfitted estimator for the configured model type"""
+        if self.model_type == 'gradient_boosting':
+            return GradientBoostingRegressor(**self.model_params)
+        if self.model_type == 'sgd':
+            return Pipeline([
+                ('scaler', StandardScaler()),
+                ('regressor', SGDRegressor(**self.sgd_params))
+            ])
+        
+        raise ValueError(f"Unsupported model type: {self.model_type}")
+    
+    @staticmethod
+    def _data_fingerprint(data):
+        """Stable content hash of a DataFrame"""
+        row_hashes = pd.util.hash_pandas_object(data, index=True).to_numpy()
+        digest = hashlib.sha1(row_hashes.tobytes())
+        digest.update(','.join(map(str, data.columns)).encode())
+        return digest.hexdigest()
+    
+    def _get_feature_matrix(self, data, target_column='fatalities'):
+        """
+        Build (or reuse) the feature matrix for a dataset
+        
+        Args:
+            data (pd.DataFrame): Raw conflict data
+            target_column (str): Target variable column name
+            
+        Returns:
+            dict: feature_columns, X, y, periods and the spatial
+                conflict history of the dataset
+        """
+        key = (self._data_fingerprint(data), target_column)
+        if key in self._feature_cache:
+            return self._feature_cache[key]
+        
+        # Spatial lags of a training dataset only see its own history, never
+        # the one recorded by an earlier fit on other data
+        conflict_history = None
+        if self.spatial_weights is not None:
+            conflict_history = self._conflict_history(self._country_period_sums(data))
+        
+        X, feature_columns = self.build_feature_matrix(
+            data, target_column=target_column, conflict_history=conflict_history
+        )
+        
+        matrix = {
+            'fingerprint': key[0],
+            'feature_columns': feature_columns,
+            'X': X,
+            'y': data[target_column].to_numpy(dtype=np.float64, na_value=0),
+            'periods': pd.to_datetime(data['date']),
+            'conflict_history': conflict_history
+        }
+        
+        if len(self._feature_cache) >= self._max_feature_cache:
+            self._feature_cache.pop(next(iter(self._feature_cache)))
+        self._feature_cache[key] = matrix
+        
+        return matrix
+    
     def get_feature_importance(self):
         """Get feature importance scores"""
         if not self.is_trained:
@@ -203,8 +1412,93 @@ class EventPredictor:
         
         importance_df = pd.DataFrame({
             'feature': self.feature_columns,
-            'importance': self.model.feature_importances_
+            'importance': self._feature_importances()
         }).sort_values('importance', ascending=False)
         
         return importance_df
+    
+    def get_permutation_importance(self, data, target_column='fatalities', n_repeats=10,
+                                   confidence=0.95, n_jobs=-1, random_state=42):
+        """
+        Permutation feature importance with confidence intervals
+        
+        The baseline RMSE is computed once; each feature is then shuffled
+        ``n_repeats`` times in parallel worker processes that share one
+        memory-mapped copy of the feature matrix. Results are cached per
+        model version and dataset.
+        
+        Args:
+            data (pd.DataFrame): Evaluation data
+            target_column (str): Target variable column name
+            n_repeats (int): Shuffles per feature
+            confidence (float): Confidence level of the reported interval
+            n_jobs (int): Number of worker processes (-1 uses all cores)
+            random_state (int): Seed for the shuffles
+            
+        Returns:
+            pd.DataFrame: Mean RMSE increase per feature with its interval
+        """
+        if not self.is_trained:
+            raise ValueError("Model must be trained first")
+        
+        matrix = self._get_feature_matrix(data, target_column)
+        key = (self.model_version, matrix['fingerprint'], target_column, n_repeats, confidence, random_state)
+        if key in self._importance_cache:
+            return self._importance_cache[key].copy()
+        
+        if matrix['feature_columns'] != self.feature_columns:
+            X, _ = self.build_feature_matrix(data, self.feature_columns)
+        else:
+            X = matrix['X']
+        y = matrix['y']
+        baseline_rmse = float(np.sqrt(mean_squared_error(y, self.predict_matrix(X))))
+        
+        feature_names = self.feature_columns if hasattr(self.model, 'feature_names_in_') else None
+        
+        # Share X with the workers through a read-only memory map
+        mmap_dir = tempfile.mkdtemp(prefix='permutation_importance_')
+        try:
+            mmap_path = os.path.join(mmap_dir, 'X.npy')
+            np.save(mmap_path, X)
+            X_shared = np.load(mmap_path, mmap_mode='r')
+            
+            drops = Parallel(n_jobs=n_jobs)(
+                delayed(_permutation_drops)(
+                    self.model, X_shared, y, column, n_repeats, random_state + column,
+                    baseline_rmse, feature_names
+                )
+                for column in range(X.shape[1])
+            )
+        finally:
+            shutil.rmtree(mmap_dir, ignore_errors=True)
+        
+        drops = np.vstack(drops)
+        mean = drops.mean(axis=1)
+        std = drops.std(axis=1, ddof=1) if n_repeats > 1 else np.zeros(len(mean))
+        margin = stats.t.ppf(0.5 + confidence / 2, df=max(n_repeats - 1, 1)) * std / np.sqrt(n_repeats)
+        
+        importance_df = pd.DataFrame({
+            'feature': self.feature_columns,
+            'importance_mean': mean,
+            'importance_std': std,
+            'ci_lower': mean - margin,
+            'ci_upper': mean + margin
+        }).sort_values('importance_mean', ascending=False).reset_index(drop=True)
+        importance_df.attrs['baseline_rmse'] = baseline_rmse
+        
+        # Drop results that belong to older model versions
+        self._importance_cache = {
+            k: v for k, v in self._importance_cache.items() if k[0] == self.model_version
+        }
+        self._importance_cache[key] = importance_df
+        
+        return importance_df.copy()
+    
+    def _feature_importances(self):
+        """Impurity importances for trees, normalized |coef| for linear models"""
+        if isinstance(self.model, Pipeline):
+            coef = np.abs(self.model.named_steps['regressor'].coef_)
+            return coef / max(coef.sum(), 1e-12)
+        
+        return self.model.feature_importances_
 
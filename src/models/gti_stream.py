@@ -0,0 +1,362 @@
+"""
+GTI Stream Module
+Incremental Geopolitical Tension Index computation over unbounded narrative feeds
+
+Author: Gabriel Demetrios Lafis
+"""
+
+import numpy as np
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+def _to_epoch(timestamp) -> float:
+    """Convert a datetime, ISO string, pandas Timestamp or number to epoch seconds"""
+    if timestamp is None:
+        return datetime.now().timestamp()
+    if isinstance(timestamp, (int, float, np.integer, np.floating)):
+        return float(timestamp)
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp)
+    return timestamp.timestamp()
+
+
+class GTIAccumulator:
+    """
+    Running, per-country GTI over a stream of narratives.
+
+    Only the source-weighted tension and confidence sums, the narrative
+    count and the last timestamp are kept per country, so memory does not
+    grow with the number of texts. Texts are scored in buffered batches
+    through ``NarrativeAnalyzer.score_corpus`` and then discarded; the GTI
+    of a country equals ``calculate_gti_score`` over all texts it received.
+    """
+
+    GLOBAL = 'GLOBAL'
+
+    def __init__(self, analyzer):
+        """
+        Initialize the accumulator
+
+        Args:
+            analyzer (NarrativeAnalyzer): Analyzer used to score the texts
+        """
+        self.logger = logging.getLogger(__name__)
+        self.analyzer = analyzer
+        self.country_index = {}
+
+        self._counts = np.zeros(0, dtype=np.int64)
+        self._tension = np.zeros(0, dtype=np.float64)
+        self._confidence = np.zeros(0, dtype=np.float64)
+        self._last_seen = np.zeros(0, dtype=np.float64)
+
+    def _country_ids(self, countries: Sequence[str]) -> np.ndarray:
+        """Map countries to state rows, growing the state arrays as needed"""
+        ids = np.fromiter(
+            (self.country_index.setdefault(country, len(self.country_index)) for country in countries),
+            dtype=np.int64, count=len(countries)
+        )
+
+        if len(self.country_index) > len(self._last_seen):
+            self._grow(max(len(self.country_index), 2 * len(self._last_seen), 16) - len(self._last_seen))
+
+        return ids
+
+    def _grow(self, grow: int):
+        """Append ``grow`` empty country rows to the state arrays"""
+        self._counts = np.concatenate([self._counts, np.zeros(grow, dtype=np.int64)])
+        self._tension = np.concatenate([self._tension, np.zeros(grow)])
+        self._confidence = np.concatenate([self._confidence, np.zeros(grow)])
+        self._last_seen = np.concatenate([self._last_seen, np.full(grow, -np.inf)])
+
+    def _score_rows(self, narratives: List[str], sources: Optional[List[str]], countries: Optional[List[str]],
+                    timestamps: Optional[Sequence], text_index: Optional[Sequence[int]]) -> Tuple[np.ndarray, ...]:
+        """
+        Score every text once and expand the scores to one row per country assignment
+
+        Returns:
+            Tuple[np.ndarray, ...]: Country ids, epoch seconds, weighted
+            tension and weighted confidence per row
+        """
+        scores = self.analyzer.score_corpus(narratives, sources)
+        tension = scores['weighted_tension']
+        confidence = scores['confidence'] * scores['source_weight']
+        epochs = self._epochs(timestamps, len(narratives))
+
+        if text_index is not None:
+            text_index = np.asarray(text_index, dtype=np.int64)
+            tension, confidence, epochs = tension[text_index], confidence[text_index], epochs[text_index]
+
+        ids = self._country_ids(countries if countries is not None else [self.GLOBAL] * len(tension))
+        return ids, epochs, tension, confidence
+
+    def update(self, narratives: List[str], sources: List[str] = None,
+               countries: List[str] = None, timestamps: Sequence = None,
+               text_index: Optional[Sequence[int]] = None) -> 'GTIAccumulator':
+        """
+        Score a batch of narratives and fold it into the running sums
+
+        Args:
+            narratives (List[str]): Narrative texts
+            sources (List[str]): Source types (missing entries weigh 1.0)
+            countries (List[str]): Country per text, or per ``text_index``
+                entry (default: GLOBAL)
+            timestamps (Sequence): Publication time per text (default: now)
+            text_index (Optional[Sequence[int]]): Text of every (text,
+                country) assignment, so a text mentioning several countries
+                is scored once (default: one assignment per text)
+
+        Returns:
+            GTIAccumulator: self
+        """
+        if not narratives:
+            return self
+
+        ids, epochs, tension, confidence = self._score_rows(narratives, sources, countries, timestamps, text_index)
+        size = len(self._last_seen)
+
+        self._counts += np.bincount(ids, minlength=size)
+        self._tension += np.bincount(ids, weights=tension, minlength=size)
+        self._confidence += np.bincount(ids, weights=confidence, minlength=size)
+
+        np.maximum.at(self._last_seen, ids, epochs)
+
+        return self
+
+    @staticmethod
+    def _epochs(timestamps: Optional[Sequence], n_texts: int) -> np.ndarray:
+        """Epoch seconds per text (now when no timestamps are given)"""
+        if timestamps is None:
+            return np.full(n_texts, datetime.now().timestamp())
+        return np.fromiter((_to_epoch(ts) for ts in timestamps), dtype=np.float64, count=n_texts)
+
+    def consume(self, stream: Iterable, batch_size: int = 1000) -> 'GTIAccumulator':
+        """
+        Consume an iterator of narratives in buffered batches
+
+        Args:
+            stream (Iterable): Items ``(text, source, timestamp)`` or
+                ``(text, source, timestamp, country)``
+            batch_size (int): Texts scored per batch
+
+        Returns:
+            GTIAccumulator: self
+        """
+        texts, sources, timestamps, countries = [], [], [], []
+        consumed = 0
+
+        for item in stream:
+            texts.append(item[0])
+            sources.append(item[1])
+            timestamps.append(item[2])
+            countries.append(item[3] if len(item) > 3 else self.GLOBAL)
+
+            if len(texts) >= batch_size:
+                self.update(texts, sources, countries, timestamps)
+                consumed += len(texts)
+                texts, sources, timestamps, countries = [], [], [], []
+
+        if texts:
+            self.update(texts, sources, countries, timestamps)
+            consumed += len(texts)
+
+        self.logger.debug(f"Consumed {consumed} narratives into {len(self.country_index)} countries")
+        return self
+
+    def get_gti(self, country: str = GLOBAL) -> Dict:
+        """
+        Current GTI of one country
+
+        Args:
+            country (str): Country key
+
+        Returns:
+            Dict: GTI score, level, confidence and narrative count
+        """
+        i = self.country_index.get(country)
+        if i is None or self._counts[i] == 0:
+            return {'country': country, 'gti_score': 50, 'gti_level': self.analyzer._gti_level(50),
+                    'confidence': 0, 'narrative_count': 0}
+
+        gti_score = self._tension[i] / self._counts[i]
+
+        return {
+            'country': country,
+            'gti_score': round(float(gti_score), 2),
+            'gti_level': self.analyzer._gti_level(gti_score),
+            'confidence': round(float(self._confidence[i] / self._counts[i]), 2),
+            'narrative_count': int(self._counts[i]),
+            'last_update': datetime.fromtimestamp(self._last_seen[i]).isoformat()
+        }
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """
+        Current GTI of every country seen so far
+
+        Returns:
+            Dict[str, Dict]: Country -> GTI summary
+        """
+        return {country: self.get_gti(country) for country in self.country_index}
+
+
+class WindowedGTIIndex(GTIAccumulator):
+    """
+    Per-country GTI over sliding time windows ("last 24h", "last 7d").
+
+    Scores are added into a ring buffer of fixed-width time buckets per
+    country, and a running sum per window is kept next to it. Moving the
+    clock forward subtracts the buckets that leave each window and clears
+    the slot that is reused, so each text is an O(1) update, expired
+    buckets roll off automatically and a window query is a constant-time
+    read. The clock follows the newest timestamp seen (or an explicit
+    ``now``); texts older than the longest window are ignored.
+    """
+
+    DEFAULT_WINDOWS = {'24h': 24 * 3600, '7d': 7 * 24 * 3600}
+
+    def __init__(self, analyzer, windows: Optional[Dict[str, float]] = None, bucket_seconds: float = 3600):
+        """
+        Initialize the index
+
+        Args:
+            analyzer (NarrativeAnalyzer): Analyzer used to score the texts
+            windows (Optional[Dict[str, float]]): Window name -> length in seconds
+            bucket_seconds (float): Bucket width (window lengths are rounded up to it)
+        """
+        self.windows = dict(windows or self.DEFAULT_WINDOWS)
+        self.bucket_seconds = float(bucket_seconds)
+        self.window_buckets = np.array(
+            [int(np.ceil(length / self.bucket_seconds)) for length in self.windows.values()], dtype=np.int64
+        )
+        self.n_buckets = int(self.window_buckets.max())
+        self.current_bucket = None
+
+        # Per country: bucket ring and window sums of (count, weighted tension, weighted confidence)
+        self._ring = np.zeros((0, self.n_buckets, 3))
+        self._window_sums = np.zeros((0, len(self.windows), 3))
+
+        super().__init__(analyzer)
+
+    def _grow(self, grow: int):
+        """Append ``grow`` empty country rows to the ring and window sums"""
+        super()._grow(grow)
+        self._ring = np.concatenate([self._ring, np.zeros((grow, self.n_buckets, 3))])
+        self._window_sums = np.concatenate([self._window_sums, np.zeros((grow, len(self.windows), 3))])
+
+    def advance(self, now) -> 'WindowedGTIIndex':
+        """
+        Move the clock forward, rolling expired buckets out of every window
+
+        Args:
+            now: Current time (datetime, ISO string or epoch seconds)
+
+        Returns:
+            WindowedGTIIndex: self
+        """
+        bucket = int(_to_epoch(now) // self.bucket_seconds)
+        if self.current_bucket is None:
+            self.current_bucket = bucket
+            return self
+        if bucket <= self.current_bucket:
+            return self
+
+        if bucket - self.current_bucket >= self.n_buckets:
+            # Everything expired
+            self._ring[:] = 0
+            self._window_sums[:] = 0
+        else:
+            for step in range(self.current_bucket + 1, bucket + 1):
+                for j, length in enumerate(self.window_buckets):
+                    self._window_sums[:, j] -= self._ring[:, (step - length) % self.n_buckets]
+                self._ring[:, step % self.n_buckets] = 0
+
+        self.current_bucket = bucket
+        return self
+
+    def update(self, narratives: List[str], sources: List[str] = None,
+               countries: List[str] = None, timestamps: Sequence = None,
+               text_index: Optional[Sequence[int]] = None) -> 'WindowedGTIIndex':
+        """
+        Score a batch of narratives and add it to the time buckets
+
+        Args:
+            narratives (List[str]): Narrative texts
+            sources (List[str]): Source types (missing entries weigh 1.0)
+            countries (List[str]): Country per text, or per ``text_index``
+                entry (default: GLOBAL)
+            timestamps (Sequence): Publication time per text (default: now)
+            text_index (Optional[Sequence[int]]): Text of every (text,
+                country) assignment (see ``GTIAccumulator.update``)
+
+        Returns:
+            WindowedGTIIndex: self
+        """
+        if not narratives:
+            return self
+
+        ids, epochs, tension, confidence = self._score_rows(narratives, sources, countries, timestamps, text_index)
+        np.maximum.at(self._last_seen, ids, epochs)
+
+        self.advance(epochs.max())
+        buckets = (epochs // self.bucket_seconds).astype(np.int64)
+        age = self.current_bucket - buckets
+
+        values = np.column_stack([np.ones(len(ids)), tension, confidence])
+
+        live = age < self.n_buckets
+        np.add.at(self._ring, (ids[live], buckets[live] % self.n_buckets), values[live])
+        for j, length in enumerate(self.window_buckets):
+            inside = age < length
+            np.add.at(self._window_sums[:, j], ids[inside], values[inside])
+
+        return self
+
+    def get_gti(self, country: str = GTIAccumulator.GLOBAL, window: str = '24h', now=None) -> Dict:
+        """
+        GTI of one country over a window
+
+        Args:
+            country (str): Country key
+            window (str): Window name
+            now: Optional current time to roll the windows forward to first
+
+        Returns:
+            Dict: GTI score, level, confidence and narrative count in the window
+        """
+        if window not in self.windows:
+            raise ValueError(f"Unknown window: {window}. Available: {list(self.windows)}")
+        if now is not None:
+            self.advance(now)
+
+        i = self.country_index.get(country)
+        count, tension, confidence = (
+            self._window_sums[i, list(self.windows).index(window)] if i is not None else (0, 0, 0)
+        )
+        # Guard against float residue left by subtracting expired buckets
+        if round(count) <= 0:
+            return {'country': country, 'window': window, 'gti_score': 50,
+                    'gti_level': self.analyzer._gti_level(50), 'confidence': 0, 'narrative_count': 0}
+
+        gti_score = tension / count
+
+        return {
+            'country': country,
+            'window': window,
+            'gti_score': round(float(gti_score), 2),
+            'gti_level': self.analyzer._gti_level(gti_score),
+            'confidence': round(float(confidence / count), 2),
+            'narrative_count': int(round(count))
+        }
+
+    def snapshot(self, window: str = '24h') -> Dict[str, Dict]:
+        """
+        GTI of every country over a window
+
+        Args:
+            window (str): Window name
+
+        Returns:
+            Dict[str, Dict]: Country -> windowed GTI summary
+        """
+        return {country: self.get_gti(country, window) for country in self.country_index}
@@ -0,0 +1,202 @@
+"""
+Keyword Matcher Module
+Compiled multi-keyword matcher for narrative lexicons
+
+Author: Gabriel Demetrios Lafis
+"""
+
+import hashlib
+import json
+import re
+import numpy as np
+from scipy import sparse
+from typing import Dict, List, Sequence
+
+
+class _SurfaceIndex(dict):
+    """Matched surface form -> vocabulary index, normalized once per distinct form"""
+
+    def __init__(self, term_index: Dict[str, int]):
+        super().__init__(term_index)
+        self.term_index = term_index
+
+    def __missing__(self, surface: str) -> int:
+        index = self.term_index[KeywordMatcher._normalize(surface)]
+        self[surface] = index
+        return index
+
+
+class KeywordMatcher:
+    """
+    Matches every term of several keyword lexicons in one pass over a text.
+
+    All terms (single words and multi-word phrases) are compiled into one
+    case-insensitive, trie-shaped alternation with word boundaries, longest
+    terms first, so "war" no longer matches inside "warning" or "software"
+    and phrases such as "trade war" are found as a unit. A simple plural suffix
+    ("threats", "tensions") matches its base term. A phrase also counts
+    the lexicon terms it contains ("trade war" implies "war").
+    """
+
+    def __init__(self, lexicons: Dict[str, List[str]]):
+        """
+        Compile the lexicons
+
+        Args:
+            lexicons (Dict[str, List[str]]): Category name -> keywords/phrases
+        """
+        self.lexicons = {category: list(terms) for category, terms in lexicons.items()}
+        self.categories = list(self.lexicons)
+        self.version = hashlib.sha1(
+            json.dumps(self.lexicons, sort_keys=True).encode()
+        ).hexdigest()[:12]
+
+        # Vocabulary of unique normalized terms
+        self.terms = []
+        self.term_index = {}
+        for terms in self.lexicons.values():
+            for term in terms:
+                normalized = self._normalize(term)
+                if normalized not in self.term_index:
+                    self.term_index[normalized] = len(self.terms)
+                    self.terms.append(normalized)
+
+        # Term x category indicator matrix
+        self.category_matrix = np.zeros((len(self.terms), len(self.categories)), dtype=np.int64)
+        for j, category in enumerate(self.categories):
+            for term in self.lexicons[category]:
+                self.category_matrix[self.term_index[self._normalize(term)], j] = 1
+
+        # Terms implied by each match: the term itself plus lexicon words inside a phrase
+        self.implied_terms = []
+        for term in self.terms:
+            implied = [self.term_index[term]]
+            if ' ' in term:
+                implied += [self.term_index[word] for word in term.split() if word in self.term_index]
+            self.implied_terms.append(implied)
+        implied_rows = [i for i, implied in enumerate(self.implied_terms) for _ in implied]
+        implied_columns = [j for implied in self.implied_terms for j in implied]
+        self.implication_matrix = sparse.csr_matrix(
+            (np.ones(len(implied_rows), dtype=np.int64), (implied_rows, implied_columns)),
+            shape=(len(self.terms), len(self.terms))
+        )
+        self._surface_index = _SurfaceIndex(self.term_index)
+
+        # Lowercase texts are matched case-sensitively (much faster); the
+        # case-insensitive variant covers texts whose length changes when
+        # lowercased. Group 1 is the whole match, group 2 the lexicon term.
+        alternation = self._trie_regex(self.terms)
+        self.pattern = re.compile(r'\b((' + alternation + r')(?:s|es)?)\b')
+        self._pattern_ignorecase = re.compile(self.pattern.pattern, re.IGNORECASE)
+
+    @staticmethod
+    def _normalize(term: str) -> str:
+        """Lowercase and collapse whitespace"""
+        return ' '.join(term.lower().split())
+
+    @staticmethod
+    def _trie_regex(terms: List[str]) -> str:
+        """
+        Build a prefix-trie shaped alternation of the terms
+
+        Shared prefixes are matched once, so the regex engine does not retry
+        every term at each position. Longer terms are tried before shorter
+        ones (the optional continuation is greedy).
+        """
+        root = {}
+        for term in terms:
+            node = root
+            for char in term:
+                node = node.setdefault(char, {})
+            node[''] = {}
+
+        def emit(node):
+            branches = [
+                (r'\s+' if char == ' ' else re.escape(char)) + emit(child)
+                for char, child in sorted(node.items()) if char != ''
+            ]
+            if not branches:
+                return ''
+            body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+            return '(?:' + body + ')?' if '' in node else body
+
+        return emit(root)
+
+    def _split(self, text: str) -> List[str]:
+        """
+        Split a text around its term matches
+
+        Returns ``[gap, match, term, gap, match, term, ..., gap]``, so the
+        regex engine does all the scanning in C and no match object is built.
+        """
+        lowered = text.lower()
+        if len(lowered) == len(text):
+            return self.pattern.split(lowered)
+        return self._pattern_ignorecase.split(text)
+
+    def find_terms(self, text: str) -> List[int]:
+        """
+        Vocabulary indices of all term occurrences in a text
+
+        Args:
+            text (str): Text to scan
+
+        Returns:
+            List[int]: Term indices (with repeats, in text order)
+        """
+        term_ids = map(self._surface_index.__getitem__, self._split(text)[2::3])
+        return [implied for term_id in term_ids for implied in self.implied_terms[term_id]]
+
+    def count_categories(self, text: str) -> Dict[str, int]:
+        """
+        Number of distinct terms of each category present in a text
+
+        Args:
+            text (str): Text to scan
+
+        Returns:
+            Dict[str, int]: Category -> distinct matching terms
+        """
+        present = np.unique(self.find_terms(text)).astype(np.int64)
+        counts = self.category_matrix[present].sum(axis=0) if len(present) else np.zeros(len(self.categories), dtype=np.int64)
+        return dict(zip(self.categories, counts.tolist()))
+
+    def term_matrix(self, texts: Sequence[str]) -> sparse.csr_matrix:
+        """
+        Binary document-term matrix over the lexicon vocabulary
+
+        The corpus is split around its matches as one string (documents
+        separated by NUL, which no term or word boundary can cross) and
+        matches are assigned to documents by their offsets, so there is one
+        regex pass for the whole corpus and no per-match Python work.
+        Phrases add the lexicon words they contain through
+        ``implication_matrix``.
+
+        Args:
+            texts (Sequence[str]): Documents
+
+        Returns:
+            sparse.csr_matrix: (n_texts, n_terms) matrix, 1 where a term occurs
+        """
+        lengths = np.fromiter((len(text) + 1 for text in texts), dtype=np.int64, count=len(texts))
+        offsets = np.concatenate(([0], np.cumsum(lengths)))
+
+        parts = self._split('\0'.join(texts))
+        n_matches = len(parts) // 3
+
+        # A match starts after all gaps and matches before it (term pieces
+        # repeat their match, so they do not count)
+        part_lengths = np.fromiter(map(len, parts), dtype=np.int64, count=len(parts))
+        part_lengths[2::3] = 0
+        starts = np.cumsum(part_lengths)[0:-1:3]
+        term_ids = np.fromiter(map(self._surface_index.__getitem__, parts[2::3]), dtype=np.int64, count=n_matches)
+
+        rows = np.searchsorted(offsets, starts, side='right') - 1
+        occurrences = sparse.csr_matrix(
+            (np.ones(n_matches, dtype=np.int64), (rows, term_ids)),
+            shape=(len(texts), len(self.terms))
+        )
+        matrix = (occurrences @ self.implication_matrix).tocsr()
+        matrix.data[:] = 1
+
+        return matrix
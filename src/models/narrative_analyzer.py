@@ -11,9 +11,37 @@ import requests
 import re
 from datetime import datetime, timedelta
 import logging
+import hashlib
+import heapq
+import itertools
+from collections import Counter
 from typing import List, Dict, Optional
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.naive_bayes import MultinomialNB
+from joblib import Parallel, delayed
+from models.keyword_matcher import KeywordMatcher
+from models.gti_stream import GTIAccumulator, WindowedGTIIndex
+from models.near_duplicates import NearDuplicateDetector
+from models.result_cache import ResultCache
+from models.tension_classifier import TensionClassifier
+from models.embedding_scorer import EmbeddingScorer
+
+# Analyzers built inside worker processes, keyed by everything they score with
+_WORKER_ANALYZERS = {}
+
+
+def _score_chunk(lexicon_config: Dict, narratives: List[str]) -> Dict:
+    """Score the content of one corpus chunk (runs inside a worker process)"""
+    key = (lexicon_config['version'], tuple(lexicon_config['risk_factors']))
+    analyzer = _WORKER_ANALYZERS.get(key)
+    if analyzer is None:
+        # Compile the lexicon once per worker; loky keeps workers alive between calls
+        analyzer = NarrativeAnalyzer()
+        analyzer.keyword_matcher = KeywordMatcher(lexicon_config['lexicons'])
+        analyzer.lexicon_version = analyzer.keyword_matcher.version
+        analyzer.risk_patterns = dict.fromkeys(lexicon_config['risk_factors'])
+        _WORKER_ANALYZERS[key] = analyzer
+    
+    return analyzer._keyword_scores(narratives)
+
 
 class NarrativeAnalyzer:
     """
@@ -21,6 +49,11 @@ class NarrativeAnalyzer:
     Geopolitical Tension Index (GTI) scores using basic NLP.
     """
     
+    CONTENT_COLUMNS = ('tension_score', 'sentiment_code', 'high_tension_keywords',
+                       'moderate_tension_keywords', 'diplomatic_keywords', 'confidence', 'risk_mask')
+    RESULT_MODES = ('full', 'summary', 'columnar', 'dataframe')
+    SENTIMENT_LABELS = np.array(['very_positive', 'positive', 'neutral', 'negative', 'very_negative'], dtype=object)
+    
     def __init__(self):
         """Initialize the Narrative Analyzer with basic NLP tools"""
         self.logger = logging.getLogger(__name__)
@@ -42,10 +75,52 @@ class NarrativeAnalyzer:
             ]
         }
         
-        # Initialize basic classifier
-        self.vectorizer = TfidfVectorizer(max_features=1000, stop_words='english')
-        self.classifier = MultinomialNB()
+        # Credibility weights per source type
+        self.source_weights = {
+            'official': 1.5,
+            'media': 1.0,
+            'social': 0.7,
+            'academic': 1.2
+        }
+        
+        # Keyword groups used to flag specific risk factors
+        self.risk_patterns = {
+            'Nuclear Threats': ['nuclear', 'atomic', 'warhead', 'missile'],
+            'Military Mobilization': ['military', 'troops', 'deployment', 'mobilization'],
+            'Economic Sanctions': ['sanctions', 'embargo', 'trade war', 'economic pressure'],
+            'Diplomatic Crisis': ['ambassador', 'embassy', 'diplomatic', 'expulsion'],
+            'Cyber Warfare': ['cyber', 'hacking', 'digital', 'infrastructure attack'],
+            'Territorial Disputes': ['territory', 'border', 'sovereignty', 'occupation'],
+            'Alliance Tensions': ['nato', 'alliance', 'coalition', 'partnership'],
+            'Energy Security': ['oil', 'gas', 'energy', 'pipeline', 'supply']
+        }
+        
+        # All lexicons compiled into a single word-boundary matcher
+        self.build_keyword_matcher()
+        
+        # Learned tension classifier (see train_classifier); keyword scoring
+        # is used until one is trained or loaded, or when use_classifier is False
+        self.classifier = None
         self.is_trained = False
+        self.use_classifier = True
+        
+        # Optional sentence-embedding scorer (see enable_embedding_scorer);
+        # takes precedence over the classifier when set
+        self.embedding_scorer = None
+        
+        # Sliding-window GTI index (see enable_windowed_gti)
+        self.windowed_gti = None
+        
+        # Near-duplicate clustering for syndicated texts
+        self.duplicate_detector = NearDuplicateDetector()
+        
+        # Optional per-text analysis cache (see enable_analysis_cache)
+        self.analysis_cache = None
+        
+    def build_keyword_matcher(self):
+        """Compile the tension and risk-factor lexicons (call again after editing them)"""
+        self.keyword_matcher = KeywordMatcher({**self.tension_keywords, **self.risk_patterns})
+        self.lexicon_version = self.keyword_matcher.version
         
     def analyze_narrative_sentiment(self, text: str) -> Dict:
         """
@@ -57,119 +132,430 @@ class NarrativeAnalyzer:
         Returns:
             Dict: Sentiment analysis results
         """
-        text_lower = text.lower()
-        
-        # Count tension keywords
-        high_tension_count = sum(1 for word in self.tension_keywords['high_tension'] if word in text_lower)
-        moderate_tension_count = sum(1 for word in self.tension_keywords['moderate_tension'] if word in text_lower)
-        diplomatic_count = sum(1 for word in self.tension_keywords['diplomatic'] if word in text_lower)
-        
-        total_words = len(text.split())
-        
-        # Calculate tension score (0-100)
-        tension_score = min(100, (high_tension_count * 10 + moderate_tension_count * 5 - diplomatic_count * 3) * (100 / max(1, total_words)) * 10)
-        tension_score = max(0, tension_score)
-        
-        # Determine sentiment
-        if tension_score > 70:
-            sentiment = 'very_negative'
-        elif tension_score > 50:
-            sentiment = 'negative'
-        elif tension_score > 30:
-            sentiment = 'neutral'
-        elif tension_score > 10:
-            sentiment = 'positive'
-        else:
-            sentiment = 'very_positive'
+        scores = self.score_corpus([text])
+        
+        return {
+            'tension_score': float(scores['tension_score'][0]),
+            'sentiment': str(scores['sentiment'][0]),
+            'high_tension_keywords': int(scores['high_tension_keywords'][0]),
+            'moderate_tension_keywords': int(scores['moderate_tension_keywords'][0]),
+            'diplomatic_keywords': int(scores['diplomatic_keywords'][0]),
+            'confidence': int(scores['confidence'][0])
+        }
+    
+    def score_corpus(self, narratives: List[str], sources: List[str] = None,
+                     n_jobs: int = 1, chunk_size: int = 20000) -> Dict[str, np.ndarray]:
+        """
+        Score a whole corpus at once with a sparse document-term matrix
+        
+        The corpus is matched against the lexicon in one pass; keyword counts,
+        tension scores, sentiment buckets, confidence and source weights are
+        then computed for all texts with sparse matrix and array operations.
+        
+        Args:
+            narratives (List[str]): List of narrative texts
+            sources (List[str]): List of source types (missing entries weigh 1.0)
+            n_jobs (int): Worker processes for corpora larger than one chunk
+                (-1 uses all cores)
+            chunk_size (int): Texts per worker task
             
+        Returns:
+            Dict[str, np.ndarray]: Per-text columns (one array per analysis field)
+        """
+        return self._columns_from_content(self._content_scores(narratives, n_jobs, chunk_size), sources)
+    
+    def _columns_from_content(self, content: Dict[str, np.ndarray], sources: Optional[List[str]]) -> Dict[str, np.ndarray]:
+        """Per-text analysis columns from content scores and source weights"""
+        source_weight = self._source_weight_vector(sources, len(content['tension_score']))
+        
+        return {
+            'tension_score': content['tension_score'],
+            'sentiment': self.SENTIMENT_LABELS[content['sentiment_code']],
+            'high_tension_keywords': content['high_tension_keywords'],
+            'moderate_tension_keywords': content['moderate_tension_keywords'],
+            'diplomatic_keywords': content['diplomatic_keywords'],
+            'confidence': content['confidence'],
+            'source_weight': source_weight,
+            'weighted_tension': content['tension_score'] * source_weight
+        }
+    
+    def _content_scores(self, narratives: List[str], n_jobs: int = 1, chunk_size: int = 20000) -> Dict[str, np.ndarray]:
+        """
+        Source-independent scores of every text, served from the analysis
+        cache when enabled
+        
+        Returns:
+            Dict[str, np.ndarray]: CONTENT_COLUMNS arrays
+        """
+        if self.analysis_cache is None:
+            return self._compute_content_scores(narratives, n_jobs, chunk_size)
+        
+        self.analysis_cache.ensure_version(self._scoring_version())
+        scorer = self._tension_scorer()
+        normalize = scorer is None or scorer.normalizes_text
+        keys = [self._text_key(text, normalize) for text in narratives]
+        cached = self.analysis_cache.get_many(keys)
+        
+        # Score each distinct missing text once
+        missing = {}
+        for i, value in enumerate(cached):
+            if value is None:
+                missing.setdefault(keys[i], i)
+        
+        if missing:
+            computed = self._compute_content_scores([narratives[i] for i in missing.values()], n_jobs, chunk_size)
+            rows = dict(zip(missing, np.column_stack([computed[name] for name in self.CONTENT_COLUMNS]).tolist()))
+            cached = [rows[key] if value is None else value for key, value in zip(keys, cached)]
+            self.analysis_cache.put_many(list(rows), list(rows.values()))
+        
+        table = np.array(cached, dtype=np.float64).reshape(len(narratives), len(self.CONTENT_COLUMNS))
+        columns = {name: table[:, j] for j, name in enumerate(self.CONTENT_COLUMNS)}
+        for name in self.CONTENT_COLUMNS[1:]:
+            columns[name] = columns[name].astype(np.int64)
+        
+        return columns
+    
+    def _compute_content_scores(self, narratives: List[str], n_jobs: int = 1,
+                                chunk_size: int = 20000) -> Dict[str, np.ndarray]:
+        """Content scores (CONTENT_COLUMNS) of every text, using the learned classifier if active"""
+        if n_jobs != 1 and len(narratives) > chunk_size:
+            content = self._score_corpus_parallel(narratives, n_jobs, chunk_size)
+        else:
+            content = self._keyword_scores(narratives)
+        
+        scorer = self._tension_scorer()
+        if scorer is not None:
+            content['tension_score'] = scorer.score(narratives)
+            content['sentiment_code'] = np.searchsorted([10, 30, 50, 70], content['tension_score'], side='left')
+        
+        return content
+    
+    def _keyword_scores(self, narratives: List[str]) -> Dict[str, np.ndarray]:
+        """Keyword-based content scores (CONTENT_COLUMNS) of every text"""
+        matcher = self.keyword_matcher
+        
+        # Distinct keywords per category: (texts x terms) @ (terms x categories)
+        category_counts = np.asarray(matcher.term_matrix(narratives) @ matcher.category_matrix)
+        high = category_counts[:, matcher.categories.index('high_tension')]
+        moderate = category_counts[:, matcher.categories.index('moderate_tension')]
+        diplomatic = category_counts[:, matcher.categories.index('diplomatic')]
+        
+        total_words = np.fromiter((len(text.split()) for text in narratives), dtype=np.float64, count=len(narratives))
+        
+        # Tension score (0-100)
+        keyword_points = high * 10 + moderate * 5 - diplomatic * 3
+        tension_score = np.clip(keyword_points * (100 / np.maximum(1, total_words)) * 10, 0, 100)
+        
+        # Risk factors present in each text as a bitmask over risk_patterns
+        risk_columns = [matcher.categories.index(factor) for factor in self.risk_patterns]
+        risk_mask = (category_counts[:, risk_columns] > 0) @ (1 << np.arange(len(risk_columns), dtype=np.int64))
+        
         return {
             'tension_score': tension_score,
-            'sentiment': sentiment,
-            'high_tension_keywords': high_tension_count,
-            'moderate_tension_keywords': moderate_tension_count,
-            'diplomatic_keywords': diplomatic_count,
-            'confidence': min(100, (high_tension_count + moderate_tension_count + diplomatic_count) * 10)
+            # Sentiment buckets: >70, >50, >30, >10, else
+            'sentiment_code': np.searchsorted([10, 30, 50, 70], tension_score, side='left'),
+            'high_tension_keywords': high,
+            'moderate_tension_keywords': moderate,
+            'diplomatic_keywords': diplomatic,
+            'confidence': np.minimum(100, (high + moderate + diplomatic) * 10),
+            'risk_mask': risk_mask
         }
     
-    def calculate_gti_score(self, narratives: List[str], sources: List[str] = None) -> Dict:
+    def _tension_scorer(self):
+        """Model replacing the keyword tension score (None for keyword scoring)"""
+        if self.embedding_scorer is not None:
+            return self.embedding_scorer
+        if self.is_trained and self.use_classifier:
+            return self.classifier
+        return None
+    
+    def _scoring_version(self) -> str:
+        """Version of everything that determines content scores"""
+        scorer = self._tension_scorer()
+        return self.lexicon_version if scorer is None else f"{self.lexicon_version}-{scorer.version}"
+    
+    def enable_embedding_scorer(self, scorer: Optional[EmbeddingScorer] = None, **scorer_params) -> EmbeddingScorer:
+        """
+        Score tension with sentence embeddings (requires sentence-transformers
+        unless a custom encoder is passed)
+        
+        Args:
+            scorer (Optional[EmbeddingScorer]): Ready scorer; built from
+                ``scorer_params`` when omitted
+            **scorer_params: EmbeddingScorer arguments (model_name, cache_dir,
+                batch_size, encoder)
+            
+        Returns:
+            EmbeddingScorer: Active scorer (call ``fit`` to train its head;
+            until then keyword prototypes are used)
+        """
+        scorer = scorer or EmbeddingScorer(**scorer_params)
+        if scorer.head is None and scorer.prototypes is None:
+            scorer.set_prototypes(self.tension_keywords)
+        
+        self.embedding_scorer = scorer
+        return scorer
+    
+    def train_classifier(self, source, classes, class_scores: Optional[Dict] = None,
+                         text_column: str = 'text', label_column: str = 'label',
+                         chunksize: int = 10000, **classifier_params) -> TensionClassifier:
+        """
+        Train the learned tension classifier out-of-core
+        
+        Args:
+            source: CSV/JSONL file, directory or glob (optionally gzipped), or
+                an iterable of DataFrame chunks with text and label columns
+            classes: All class labels
+            class_scores (Optional[Dict]): Class label -> tension score (0-100);
+                numeric labels are their own score when omitted
+            text_column (str): Column holding the text
+            label_column (str): Column holding the label
+            chunksize (int): Rows per training batch
+            **classifier_params: Extra TensionClassifier arguments
+            
+        Returns:
+            TensionClassifier: Trained classifier
+        """
+        classifier = TensionClassifier(class_scores=class_scores, **classifier_params)
+        classifier.fit_stream(source, classes, text_column=text_column,
+                              label_column=label_column, chunksize=chunksize)
+        
+        self.classifier = classifier
+        self.is_trained = classifier.n_samples_seen > 0
+        return classifier
+    
+    def save_classifier(self, directory: str):
+        """
+        Save the learned classifier as memory-mappable arrays
+        
+        Args:
+            directory (str): Artifact directory
+        """
+        if not self.is_trained:
+            raise ValueError("No trained classifier to save")
+        self.classifier.save(directory)
+    
+    def load_classifier(self, directory: str, mmap_mode: Optional[str] = 'r'):
+        """
+        Load a learned classifier saved with ``save_classifier``
+        
+        Args:
+            directory (str): Artifact directory
+            mmap_mode (Optional[str]): numpy mmap mode (None loads into memory)
+        """
+        self.classifier = TensionClassifier.load(directory, mmap_mode=mmap_mode)
+        self.is_trained = True
+    
+    @staticmethod
+    def _text_key(text: str, normalize: bool = True) -> str:
+        """Cache key of a text: hash of its case- and whitespace-normalized form (or of the exact text)"""
+        if normalize:
+            text = ' '.join(text.lower().split())
+        return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+    
+    def enable_analysis_cache(self, max_entries: int = 100000, cache_path: Optional[str] = None):
+        """
+        Memoize per-text analyses across calls
+        
+        Entries are keyed by a hash of the case- and whitespace-normalized
+        text (the exact text when the active scorer is case-sensitive, e.g.
+        an embedding scorer) and bound to the lexicon (and classifier)
+        version, so editing the lexicons or retraining invalidates them.
+        
+        Args:
+            max_entries (int): Maximum texts kept in memory
+            cache_path (Optional[str]): SQLite file to persist analyses (None keeps them in memory only)
+        """
+        if self.analysis_cache is not None:
+            self.analysis_cache.close()
+        self.analysis_cache = ResultCache(max_entries=max_entries, cache_path=cache_path)
+    
+    def get_cache_stats(self) -> Optional[Dict]:
+        """Analysis cache hit/miss counters (None if caching is disabled)"""
+        return self.analysis_cache.stats() if self.analysis_cache is not None else None
+    
+    def _source_weight_vector(self, sources: Optional[List[str]], n_texts: int) -> np.ndarray:
+        """Credibility weight per text (texts without a known source weigh 1.0)"""
+        source_weight = np.ones(n_texts)
+        if sources:
+            known = min(n_texts, len(sources))
+            source_weight[:known] = [self.source_weights.get(source, 1.0) for source in sources[:known]]
+        return source_weight
+    
+    def _score_deduplicated(self, narratives: List[str], sources: Optional[List[str]],
+                            duplicate_weight: float, n_jobs: int, chunk_size: int) -> Dict[str, np.ndarray]:
+        """Score each near-duplicate cluster once and down-weight the duplicates"""
+        labels = self.duplicate_detector.cluster(narratives)
+        representatives, inverse = np.unique(labels, return_inverse=True)
+        
+        cluster_scores = self.score_corpus([narratives[i] for i in representatives],
+                                           n_jobs=n_jobs, chunk_size=chunk_size)
+        scores = {name: values[inverse] for name, values in cluster_scores.items()}
+        
+        is_duplicate = labels != np.arange(len(narratives))
+        scores['source_weight'] = self._source_weight_vector(sources, len(narratives))
+        scores['duplicate_of'] = np.where(is_duplicate, labels, -1)
+        scores['duplicate_weight'] = np.where(is_duplicate, duplicate_weight, 1.0)
+        scores['weighted_tension'] = scores['tension_score'] * scores['source_weight'] * scores['duplicate_weight']
+        
+        self.logger.debug(f"Scored {len(representatives)} clusters for {len(narratives)} narratives")
+        return scores
+    
+    def _score_corpus_parallel(self, narratives: List[str], n_jobs: int, chunk_size: int) -> Dict[str, np.ndarray]:
+        """Score corpus chunks in a process pool and concatenate the columns"""
+        # Workers get the compiled lexicons, so they score exactly like the serial
+        # path; source weights are applied here, after the content columns come back
+        lexicon_config = {
+            'version': self.lexicon_version,
+            'lexicons': self.keyword_matcher.lexicons,
+            'risk_factors': list(self.risk_patterns)
+        }
+        starts = range(0, len(narratives), chunk_size)
+        
+        parts = Parallel(n_jobs=n_jobs)(
+            delayed(_score_chunk)(lexicon_config, narratives[start:start + chunk_size])
+            for start in starts
+        )
+        self.logger.debug(f"Scored {len(narratives)} narratives in {len(parts)} chunks")
+        
+        return {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+    
+    def calculate_gti_score(self, narratives: List[str], sources: List[str] = None,
+                            n_jobs: int = 1, chunk_size: int = 20000,
+                            deduplicate: bool = False, duplicate_weight: float = 0.1,
+                            result_mode: str = 'full') -> Dict:
         """
         Calculate Geopolitical Tension Index from multiple narratives
         
         Args:
             narratives (List[str]): List of narrative texts
             sources (List[str]): List of source types
+            n_jobs (int): Worker processes for large corpora (-1 uses all cores)
+            chunk_size (int): Texts per worker task
+            deduplicate (bool): Score near-duplicate clusters once
+            duplicate_weight (float): Weight of each duplicate relative to
+                its cluster representative (0 counts a cluster once)
+            result_mode (str): Per-text ``analysis`` format: 'full' (list of
+                dicts), 'columnar' (dict of numpy arrays), 'dataframe' or
+                'summary' (aggregates only, no ``analysis``)
             
         Returns:
             Dict: GTI calculation results
         """
-        if not narratives:
-            return {'gti_score': 50, 'confidence': 0, 'analysis': []}
+        self._check_result_mode(result_mode)
+        if deduplicate:
+            scores = self._score_deduplicated(narratives, sources, duplicate_weight, n_jobs, chunk_size)
+            effective_count = float(scores['duplicate_weight'].sum())
+            text_weight = scores['source_weight'] * scores['duplicate_weight']
+        else:
+            scores = self.score_corpus(narratives, sources, n_jobs=n_jobs, chunk_size=chunk_size)
+            effective_count = len(narratives)
+            text_weight = scores['source_weight']
         
-        analyses = []
-        total_tension = 0
-        total_confidence = 0
+        return self._gti_result(scores, effective_count, text_weight, result_mode)
+    
+    def _gti_result(self, scores: Dict[str, np.ndarray], effective_count: float,
+                    text_weight: np.ndarray, result_mode: str = 'full') -> Dict:
+        """GTI result dict from per-text columns (neutral when there are no texts)"""
+        # Source-weighted means
+        if effective_count > 0:
+            gti_score = float(scores['weighted_tension'].sum()) / effective_count
+            avg_confidence = float(text_weight @ scores['confidence']) / effective_count
+        else:
+            gti_score, avg_confidence = 50, 0
         
-        for i, narrative in enumerate(narratives):
-            analysis = self.analyze_narrative_sentiment(narrative)
-            
-            # Apply source weighting
-            source_weight = 1.0
-            if sources and i < len(sources):
-                source_weights = {
-                    'official': 1.5,
-                    'media': 1.0,
-                    'social': 0.7,
-                    'academic': 1.2
-                }
-                source_weight = source_weights.get(sources[i], 1.0)
-            
-            weighted_tension = analysis['tension_score'] * source_weight
-            weighted_confidence = analysis['confidence'] * source_weight
-            
-            total_tension += weighted_tension
-            total_confidence += weighted_confidence
-            
-            analysis['source_weight'] = source_weight
-            analysis['weighted_tension'] = weighted_tension
-            analyses.append(analysis)
+        result = {
+            'gti_score': round(gti_score, 2),
+            'gti_level': self._gti_level(gti_score),
+            'confidence': round(avg_confidence, 2),
+            'narrative_count': len(scores['weighted_tension']),
+            'timestamp': datetime.now().isoformat()
+        }
+        
+        if result_mode == 'full':
+            columns = {name: values.tolist() for name, values in scores.items()}
+            result['analysis'] = [dict(zip(columns, row)) for row in zip(*columns.values())]
+        elif result_mode == 'columnar':
+            result['analysis'] = scores
+        elif result_mode == 'dataframe':
+            result['analysis'] = pd.DataFrame(scores, copy=False)
+        
+        return result
+    
+    def _check_result_mode(self, result_mode: str):
+        """Validate a result_mode argument"""
+        if result_mode not in self.RESULT_MODES:
+            raise ValueError(f"Unknown result_mode: {result_mode}. Available: {list(self.RESULT_MODES)}")
+    
+    def stream_gti(self, stream, batch_size: int = 1000) -> GTIAccumulator:
+        """
+        Compute per-country GTI over an unbounded narrative feed
         
-        # Calculate final GTI score
-        gti_score = total_tension / len(narratives) if narratives else 50
-        avg_confidence = total_confidence / len(narratives) if narratives else 0
+        Args:
+            stream: Iterator of ``(text, source, timestamp)`` or
+                ``(text, source, timestamp, country)`` items
+            batch_size (int): Texts scored per batch
+            
+        Returns:
+            GTIAccumulator: Accumulator holding the running GTI (keep feeding
+            it with ``consume``/``update``)
+        """
+        return GTIAccumulator(self).consume(stream, batch_size)
+    
+    def enable_windowed_gti(self, windows: Optional[Dict[str, float]] = None,
+                            bucket_seconds: float = 3600) -> WindowedGTIIndex:
+        """
+        Maintain per-country GTI over sliding time windows
         
-        # Determine GTI level
+        Args:
+            windows (Optional[Dict[str, float]]): Window name -> length in
+                seconds (default: 24h and 7d)
+            bucket_seconds (float): Time bucket width
+            
+        Returns:
+            WindowedGTIIndex: Index to feed with ``update``/``consume`` and
+            query with ``get_gti(country, window)``
+        """
+        self.windowed_gti = WindowedGTIIndex(self, windows, bucket_seconds)
+        return self.windowed_gti
+    
+    @staticmethod
+    def _gti_level(gti_score: float) -> str:
+        """Map a GTI score to its level"""
         if gti_score > 80:
-            gti_level = 'Critical'
+            return 'Critical'
         elif gti_score > 65:
-            gti_level = 'High'
+            return 'High'
         elif gti_score > 50:
-            gti_level = 'Moderate'
+            return 'Moderate'
         elif gti_score > 35:
-            gti_level = 'Low'
+            return 'Low'
         else:
-            gti_level = 'Very Low'
-        
-        return {
-            'gti_score': round(gti_score, 2),
-            'gti_level': gti_level,
-            'confidence': round(avg_confidence, 2),
-            'narrative_count': len(narratives),
-            'analysis': analyses,
-            'timestamp': datetime.now().isoformat()
-        }
+            return 'Very Low'
     
-    def analyze_country_narratives(self, country_code: str, narratives: List[str]) -> Dict:
+    def analyze_country_narratives(self, country_code: str, narratives: List[str],
+                                   sources: List[str] = None, result_mode: str = 'full') -> Dict:
         """
         Analyze narratives specific to a country
         
+        Each text is normalized and matched once; the GTI and the risk
+        factors are both derived from that single pass.
+        
         Args:
             country_code (str): ISO country code
             narratives (List[str]): Country-specific narratives
+            sources (List[str]): Optional source types
+            result_mode (str): Format of ``narrative_analysis`` (see
+                ``calculate_gti_score``; 'summary' omits it)
             
         Returns:
             Dict: Country narrative analysis
         """
-        gti_result = self.calculate_gti_score(narratives)
+        self._check_result_mode(result_mode)
+        content = self._content_scores(narratives)
+        scores = self._columns_from_content(content, sources)
+        gti_result = self._gti_result(scores, len(narratives), scores['source_weight'], result_mode)
+        risk_factors = self._risk_factors_from_masks(content['risk_mask'])
         
         # Add country-specific analysis
         country_analysis = {
@@ -177,88 +563,109 @@ class NarrativeAnalyzer:
             'gti_score': gti_result['gti_score'],
             'gti_level': gti_result['gti_level'],
             'confidence': gti_result['confidence'],
-            'narrative_analysis': gti_result['analysis'],
-            'risk_factors': self._identify_risk_factors(narratives),
+            'narrative_count': len(narratives),
+            'risk_factors': risk_factors,
             'timestamp': datetime.now().isoformat()
         }
+        if result_mode != 'summary':
+            country_analysis['narrative_analysis'] = gti_result['analysis']
         
         return country_analysis
     
     def _identify_risk_factors(self, narratives: List[str]) -> List[str]:
         """Identify specific risk factors from narratives"""
-        risk_factors = []
-        combined_text = ' '.join(narratives).lower()
-        
-        risk_patterns = {
-            'Nuclear Threats': ['nuclear', 'atomic', 'warhead', 'missile'],
-            'Military Mobilization': ['military', 'troops', 'deployment', 'mobilization'],
-            'Economic Sanctions': ['sanctions', 'embargo', 'trade war', 'economic pressure'],
-            'Diplomatic Crisis': ['ambassador', 'embassy', 'diplomatic', 'expulsion'],
-            'Cyber Warfare': ['cyber', 'hacking', 'digital', 'infrastructure attack'],
-            'Territorial Disputes': ['territory', 'border', 'sovereignty', 'occupation'],
-            'Alliance Tensions': ['nato', 'alliance', 'coalition', 'partnership'],
-            'Energy Security': ['oil', 'gas', 'energy', 'pipeline', 'supply']
-        }
+        if not narratives:
+            return []
         
-        for factor, keywords in risk_patterns.items():
-            if any(keyword in combined_text for keyword in keywords):
-                risk_factors.append(factor)
+        return self._risk_factors_from_masks(self._content_scores(narratives)['risk_mask'])
+    
+    def _risk_factors_from_masks(self, risk_masks: np.ndarray) -> List[str]:
+        """Risk factors present in any text, from per-text risk-factor bitmasks"""
+        combined = int(np.bitwise_or.reduce(risk_masks)) if len(risk_masks) else 0
         
-        return risk_factors
+        return [factor for j, factor in enumerate(self.risk_patterns) if combined >> j & 1]
     
-    def generate_narrative_report(self, country_analyses: List[Dict]) -> Dict:
+    def generate_narrative_report(self, country_analyses, compact: bool = False,
+                                  max_hotspots: Optional[int] = None, top_k_risk_factors: int = 5) -> Dict:
         """
         Generate comprehensive narrative analysis report
         
+        A DataFrame input is processed column-wise and its hotspots and
+        country analyses are returned as DataFrames; a list input returns
+        lists of the original dicts.
+        
         Args:
-            country_analyses (List[Dict]): List of country analyses
+            country_analyses: List of country analyses, or a DataFrame with one
+                row per country/region (gti_score and optional country,
+                gti_level, risk_factors columns)
+            compact (bool): Skip per-country payloads: hotspots carry summary
+                fields only and ``country_analyses`` is omitted
+            max_hotspots (Optional[int]): Keep only the highest-scoring hotspots
+            top_k_risk_factors (int): Number of most frequent risk factors
             
         Returns:
             Dict: Comprehensive report
         """
-        if not country_analyses:
+        if country_analyses is None or len(country_analyses) == 0:
             return {'error': 'No country analyses provided'}
         
-        # Calculate global metrics
-        global_gti = np.mean([analysis['gti_score'] for analysis in country_analyses])
-        max_gti = max([analysis['gti_score'] for analysis in country_analyses])
-        min_gti = min([analysis['gti_score'] for analysis in country_analyses])
+        summary_fields = ('country', 'gti_score', 'gti_level')
         
-        # Identify hotspots
-        hotspots = [
-            analysis for analysis in country_analyses 
-            if analysis['gti_score'] > 70
-        ]
-        
-        # Aggregate risk factors
-        all_risk_factors = []
-        for analysis in country_analyses:
-            all_risk_factors.extend(analysis.get('risk_factors', []))
-        
-        risk_factor_counts = {}
-        for factor in all_risk_factors:
-            risk_factor_counts[factor] = risk_factor_counts.get(factor, 0) + 1
-        
-        top_risk_factors = sorted(
-            risk_factor_counts.items(), 
-            key=lambda x: x[1], 
-            reverse=True
-        )[:5]
+        if isinstance(country_analyses, pd.DataFrame):
+            frame = country_analyses
+            gti = frame['gti_score'].to_numpy(dtype=np.float64)
+            
+            hotspots = frame[gti > 70]
+            if max_hotspots is not None and len(hotspots) > max_hotspots:
+                hotspots = hotspots.nlargest(max_hotspots, 'gti_score')
+            if compact:
+                hotspots = hotspots[[field for field in summary_fields if field in frame.columns]]
+            
+            # Top-k risk factors (ties keep first-seen order)
+            top_risk_factors = []
+            if 'risk_factors' in frame.columns:
+                counts = frame['risk_factors'].explode().dropna().value_counts(sort=False)
+                counts = counts.sort_values(ascending=False, kind='stable').head(top_k_risk_factors)
+                top_risk_factors = [(factor, int(count)) for factor, count in counts.items()]
+            
+            country_entries = frame
+        else:
+            records = country_analyses
+            gti = np.fromiter((analysis['gti_score'] for analysis in records), dtype=np.float64, count=len(records))
+            
+            # Hotspots, optionally only the top-k by GTI
+            hotspot_rows = np.flatnonzero(gti > 70)
+            if max_hotspots is not None and len(hotspot_rows) > max_hotspots:
+                hotspot_rows = heapq.nlargest(max_hotspots, hotspot_rows, key=gti.__getitem__)
+            if compact:
+                hotspots = [{field: records[i].get(field) for field in summary_fields} for i in hotspot_rows]
+            else:
+                hotspots = [records[i] for i in hotspot_rows]
+            
+            # Top-k risk factors (ties keep first-seen order)
+            risk_lists = (analysis.get('risk_factors') for analysis in records)
+            risk_factor_counts = Counter(itertools.chain.from_iterable(
+                factors for factors in risk_lists if isinstance(factors, (list, tuple))
+            ))
+            top_risk_factors = risk_factor_counts.most_common(top_k_risk_factors)
+            
+            country_entries = records
         
         report = {
             'global_metrics': {
-                'global_gti_score': round(global_gti, 2),
-                'max_gti_score': round(max_gti, 2),
-                'min_gti_score': round(min_gti, 2),
-                'countries_analyzed': len(country_analyses),
-                'hotspot_count': len(hotspots)
+                'global_gti_score': round(float(gti.mean()), 2),
+                'max_gti_score': round(float(gti.max()), 2),
+                'min_gti_score': round(float(gti.min()), 2),
+                'countries_analyzed': len(gti),
+                'hotspot_count': int(np.count_nonzero(gti > 70))
             },
             'hotspots': hotspots,
             'top_risk_factors': top_risk_factors,
-            'country_analyses': country_analyses,
             'report_timestamp': datetime.now().isoformat(),
             'methodology': 'Basic NLP with keyword-based sentiment analysis'
         }
+        if not compact:
+            report['country_analyses'] = country_entries
         
         return report
 
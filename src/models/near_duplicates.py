@@ -0,0 +1,187 @@
+"""
+Near Duplicates Module
+MinHash/LSH detection of near-duplicate narratives (syndicated wire stories)
+
+Author: Gabriel Demetrios Lafis
+"""
+
+import numpy as np
+import logging
+import itertools
+import re
+import zlib
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+from typing import Iterable, List
+
+
+class NearDuplicateDetector:
+    """
+    Clusters near-duplicate texts with MinHash signatures and LSH banding.
+
+    Each text is reduced to word shingles and a MinHash signature whose
+    agreement rate estimates Jaccard similarity. Signatures are split into
+    bands and hashed; only texts sharing a band bucket are compared, so
+    candidate generation stays close to linear instead of all-pairs.
+    Candidates whose estimated similarity reaches ``threshold`` become
+    graph edges, and connected components form clusters represented by
+    their first text.
+    """
+
+    _TOKEN = re.compile(r'\w+')
+
+    # Elements of one (permutations x shingles) uint64 block (16MB)
+    _BLOCK_ELEMENTS = 2 ** 21
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, shingle_size: int = 3,
+                 threshold: float = 0.8, seed: int = 1, chunk_size: int = 5000,
+                 max_vocabulary: int = 1000000):
+        """
+        Initialize the detector
+
+        Args:
+            num_perm (int): MinHash permutations (signature length)
+            bands (int): LSH bands (must divide num_perm)
+            shingle_size (int): Words per shingle
+            threshold (float): Minimum estimated Jaccard similarity
+            seed (int): Random seed for the hash permutations
+            chunk_size (int): Texts hashed per vectorized step
+            max_vocabulary (int): Distinct words whose hashes are memoized; the
+                memo is reset when full (hashes are deterministic, so results
+                do not change)
+        """
+        if num_perm % bands:
+            raise ValueError(f"bands ({bands}) must divide num_perm ({num_perm})")
+
+        self.logger = logging.getLogger(__name__)
+        self.num_perm = num_perm
+        self.bands = bands
+        self.shingle_size = shingle_size
+        self.threshold = threshold
+        self.chunk_size = chunk_size
+        self.max_vocabulary = max_vocabulary
+
+        rng = np.random.RandomState(seed)
+        # Odd multipliers for multiply-shift hashing (uint64 arithmetic wraps)
+        self._a = rng.randint(1, 2 ** 62, size=num_perm).astype(np.uint64) | np.uint64(1)
+        self._b = rng.randint(0, 2 ** 62, size=num_perm).astype(np.uint64)
+        self._band_mix = (rng.randint(1, 2 ** 62, size=num_perm // bands).astype(np.uint64) | np.uint64(1))
+
+        # Distinct words seen so far and their hashes
+        self._vocabulary = {}
+        self._word_hashes = np.zeros(0, dtype=np.uint64)
+
+    def _hash_words(self, words: Iterable[str], count: int) -> np.ndarray:
+        """Stable 32-bit hashes of words, memoized per distinct word"""
+        if len(self._vocabulary) > self.max_vocabulary:
+            # Bound memory on long-lived detectors fed unbounded streams
+            self._vocabulary = {}
+            self._word_hashes = np.zeros(0, dtype=np.uint64)
+
+        vocabulary = self._vocabulary
+        ids = np.fromiter((vocabulary.setdefault(word, len(vocabulary)) for word in words),
+                          dtype=np.int64, count=count)
+
+        if len(vocabulary) > len(self._word_hashes):
+            new_words = itertools.islice(vocabulary, len(self._word_hashes), None)
+            self._word_hashes = np.concatenate([
+                self._word_hashes,
+                np.fromiter((zlib.crc32(word.encode()) for word in new_words), dtype=np.uint64)
+            ])
+
+        return self._word_hashes[ids]
+
+    def signatures(self, texts: List[str]) -> np.ndarray:
+        """
+        MinHash signatures of the texts
+
+        Words are hashed once; shingle hashes are combined from consecutive
+        word hashes and permuted with multiply-shift hashing, all as array
+        operations over a chunk of texts.
+
+        Args:
+            texts (List[str]): Texts
+
+        Returns:
+            np.ndarray: (n_texts, num_perm) uint64 signatures
+        """
+        signatures = np.empty((len(texts), self.num_perm), dtype=np.uint64)
+        k = self.shingle_size
+
+        for start in range(0, len(texts), self.chunk_size):
+            chunk = texts[start:start + self.chunk_size]
+            words = [self._TOKEN.findall(text.lower()) or [''] for text in chunk]
+            lengths = np.fromiter((len(w) for w in words), dtype=np.int64, count=len(words))
+            word_hashes = self._hash_words(itertools.chain.from_iterable(words), int(lengths.sum()))
+
+            # Shingle i of a text combines words i..i+k-1; texts shorter than
+            # k words get a single shingle over all their words
+            n_shingles = np.maximum(lengths - k + 1, 1)
+            doc_starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+            shingle_offsets = np.concatenate(([0], np.cumsum(n_shingles)[:-1]))
+            position = np.arange(n_shingles.sum()) - np.repeat(shingle_offsets, n_shingles)
+            first_word = np.repeat(doc_starts, n_shingles) + position
+            last_word = np.repeat(doc_starts + lengths, n_shingles)
+
+            shingles = np.zeros(len(first_word), dtype=np.uint64)
+            for offset in range(k):
+                word = first_word + offset
+                inside = word < last_word
+                shingles[inside] = shingles[inside] * np.uint64(1000003) + word_hashes[word[inside]]
+
+            # Multiply-shift permutations keep the top 32 bits of a * h + b,
+            # computed for a few permutations at a time to bound the intermediate
+            rows = max(1, min(self.num_perm, self._BLOCK_ELEMENTS // len(shingles)))
+            for p in range(0, self.num_perm, rows):
+                a = self._a[p:p + rows, None]
+                b = self._b[p:p + rows, None]
+                permuted = (a * shingles[None, :] + b) >> np.uint64(32)
+                signatures[start:start + len(chunk), p:p + rows] = np.minimum.reduceat(
+                    permuted, shingle_offsets, axis=1
+                ).T
+
+        return signatures
+
+    def cluster(self, texts: List[str]) -> np.ndarray:
+        """
+        Assign every text to a near-duplicate cluster
+
+        Args:
+            texts (List[str]): Texts
+
+        Returns:
+            np.ndarray: Index of each text's cluster representative (the
+            first text of the cluster; unique texts map to themselves)
+        """
+        n_texts = len(texts)
+        if n_texts < 2:
+            return np.arange(n_texts)
+
+        signatures = self.signatures(texts)
+        rows = self.num_perm // self.bands
+        edges = []
+
+        for band in range(self.bands):
+            # One uint64 key per text and band (wrapping multiply-add mix)
+            keys = signatures[:, band * rows:(band + 1) * rows] @ self._band_mix
+            _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+
+            # Candidates: every text against the first text of its bucket
+            heads = first[inverse]
+            candidates = np.flatnonzero(heads != np.arange(n_texts))
+            similarity = (signatures[candidates] == signatures[heads[candidates]]).mean(axis=1)
+            accepted = candidates[similarity >= self.threshold]
+            edges.append(np.column_stack([accepted, heads[accepted]]))
+
+        edges = np.concatenate(edges)
+        graph = sparse.csr_matrix((np.ones(len(edges)), (edges[:, 0], edges[:, 1])), shape=(n_texts, n_texts))
+        _, components = connected_components(graph, directed=False)
+
+        # Represent each cluster by its first text
+        representative = np.full(components.max() + 1, n_texts)
+        np.minimum.at(representative, components, np.arange(n_texts))
+        labels = representative[components]
+
+        self.logger.debug(f"{n_texts} texts in {len(representative)} near-duplicate clusters")
+
+        return labels
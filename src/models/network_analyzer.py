@@ -8,6 +8,7 @@ Author: Gabriel Demetrios Lafis
 import pandas as pd
 import numpy as np
 import networkx as nx
+from scipy import sparse
 import matplotlib.pyplot as plt
 import seaborn as sns
 from typing import Dict, List, Tuple, Optional
@@ -24,8 +25,10 @@ class NetworkAnalyzer:
         """Initialize the Network Analyzer"""
         self.alliance_graph = nx.Graph()
         self.trade_graph = nx.Graph()
+        self.contiguity_graph = nx.Graph()
         self.alliance_data = None
         self.trade_data = None
+        self.contiguity_data = None
         
         # Setup logging
         logging.basicConfig(level=logging.INFO)
@@ -75,6 +78,83 @@ class NetworkAnalyzer:
         except Exception as e:
             self.logger.error(f"Failed to load trade data: {e}")
     
+    def load_contiguity_data(self, data_source, data_type='csv'):
+        """
+        Load land/maritime contiguity (shared border) data
+        
+        Args:
+            data_source: Path to CSV file or DataFrame
+            data_type (str): 'csv' or 'dataframe'
+        """
+        try:
+            if data_type == 'csv':
+                self.contiguity_data = pd.read_csv(data_source)
+            elif data_type == 'dataframe':
+                self.contiguity_data = data_source.copy()
+            
+            self.logger.info(f"Loaded contiguity data: {len(self.contiguity_data)} records")
+            self._build_contiguity_network()
+            
+        except Exception as e:
+            self.logger.error(f"Failed to load contiguity data: {e}")
+    
+    def _build_contiguity_network(self):
+        """Build the contiguity (shared border) graph"""
+        if self.contiguity_data is None:
+            return
+        
+        self.contiguity_graph.clear()
+        
+        # Expected columns: country1_iso, country2_iso, [weight]
+        for _, row in self.contiguity_data.iterrows():
+            country1 = row.get('country1_iso', row.get('country1'))
+            country2 = row.get('country2_iso', row.get('country2'))
+            
+            if pd.notna(country1) and pd.notna(country2) and country1 != country2:
+                self.contiguity_graph.add_edge(country1, country2, weight=row.get('weight', 1.0))
+        
+        self.logger.info(f"Built contiguity network: {self.contiguity_graph.number_of_nodes()} nodes, {self.contiguity_graph.number_of_edges()} edges")
+    
+    def to_sparse_adjacency(self, countries: List[str], network: str = 'alliance',
+                            normalize: bool = True) -> sparse.csr_matrix:
+        """
+        Export a network as a sparse adjacency matrix over a country index
+        
+        Args:
+            countries (List[str]): Row/column order of the matrix
+            network (str): 'alliance', 'trade' or 'contiguity'
+            normalize (bool): Row-normalize so each row averages over neighbours
+            
+        Returns:
+            sparse.csr_matrix: (n_countries, n_countries) edge weights
+        """
+        graphs = {
+            'alliance': self.alliance_graph,
+            'trade': self.trade_graph,
+            'contiguity': self.contiguity_graph
+        }
+        if network not in graphs:
+            raise ValueError(f"Unknown network: {network}")
+        
+        index = {country: i for i, country in enumerate(countries)}
+        rows, cols, weights = [], [], []
+        for country1, country2, weight in graphs[network].edges(data='weight', default=1.0):
+            if country1 in index and country2 in index:
+                # Undirected graphs: store both directions
+                rows += [index[country1], index[country2]]
+                cols += [index[country2], index[country1]]
+                weights += [weight, weight]
+        
+        n = len(countries)
+        adjacency = sparse.csr_matrix((weights, (rows, cols)), shape=(n, n), dtype=np.float64)
+        
+        if normalize:
+            degree = np.asarray(adjacency.sum(axis=1)).ravel()
+            inverse = np.divide(1.0, degree, out=np.zeros_like(degree), where=degree > 0)
+            adjacency = sparse.diags(inverse) @ adjacency
+        
+        return adjacency.tocsr()
+    
     def _build_alliance_network(self):
         """Build the military alliance network graph"""
         if self.alliance_data is None:
@@ -0,0 +1,443 @@
+"""
+Prediction Service Module
+Long-lived local HTTP service that keeps EventPredictor models warm and
+micro-batches concurrent requests into single predict calls
+
+Author: Gabriel Demetrios Lafis
+"""
+
+import pandas as pd
+import numpy as np
+import json
+import logging
+import queue
+import threading
+import time
+import urllib.request
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence
+
+from models.event_predictor import EventPredictor
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    """Threaded HTTP server with a listen backlog sized for concurrent clients"""
+    request_queue_size = 128
+    daemon_threads = True
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram (cumulative counts per upper bound)
+    """
+
+    def __init__(self, bounds: Sequence[float]):
+        """
+        Initialize the histogram
+
+        Args:
+            bounds (Sequence[float]): Sorted bucket upper bounds
+        """
+        self.bounds = np.asarray(bounds, dtype=np.float64)
+        self.counts = np.zeros(len(self.bounds) + 1, dtype=np.int64)
+        self.total = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        """Record one observation"""
+        bucket = int(np.searchsorted(self.bounds, value, side='left'))
+        with self._lock:
+            self.counts[bucket] += 1
+            self.total += value
+
+    def snapshot(self) -> Dict:
+        """Current bucket counts, count, sum and mean"""
+        with self._lock:
+            counts = self.counts.copy()
+            total = self.total
+
+        n = int(counts.sum())
+        buckets = {f"le_{bound:g}": int(c) for bound, c in zip(self.bounds, np.cumsum(counts[:-1]))}
+        buckets['le_inf'] = n
+
+        return {
+            'buckets': buckets,
+            'count': n,
+            'sum': round(total, 3),
+            'mean': round(total / n, 3) if n else 0.0
+        }
+
+
+class MicroBatcher:
+    """
+    Collects concurrent prediction requests for one model and evaluates
+    them with a single ``predict_matrix`` call.
+
+    A batch is closed when ``max_batch_rows`` rows are queued or
+    ``max_wait_ms`` has passed since its first request arrived.
+    """
+
+    def __init__(self, predictor: EventPredictor, max_batch_rows: int = 1024,
+                 max_wait_ms: float = 2.0, batch_histogram: Optional[Histogram] = None):
+        """
+        Initialize the batcher and start its worker thread
+
+        Args:
+            predictor (EventPredictor): Trained predictor
+            max_batch_rows (int): Maximum rows per batch
+            max_wait_ms (float): Maximum time to wait for more requests
+            batch_histogram (Optional[Histogram]): Records rows per batch
+        """
+        self.predictor = predictor
+        self.max_batch_rows = max_batch_rows
+        self.max_wait = max_wait_ms / 1000.0
+        self.batch_histogram = batch_histogram
+        self.batches = 0
+
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, X: np.ndarray) -> Future:
+        """
+        Queue a feature matrix for prediction
+
+        Args:
+            X (np.ndarray): Feature matrix (n_rows, n_features)
+
+        Returns:
+            Future: Resolves to the predictions for ``X``
+        """
+        future = Future()
+        self._queue.put((X, future))
+        return future
+
+    def close(self):
+        """Stop the worker thread after the queued requests are served"""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        """Worker loop: gather a batch, predict once, fan results out"""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+
+            batch = [item]
+            rows = len(item[0])
+            deadline = time.perf_counter() + self.max_wait
+            stop = False
+
+            while rows < self.max_batch_rows:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+                rows += len(item[0])
+
+            self._predict_batch(batch)
+            if stop:
+                return
+
+    def _predict_batch(self, batch):
+        """Evaluate one batch and resolve its futures"""
+        try:
+            X = np.vstack([X for X, _ in batch])
+            predictions = self.predictor.predict_matrix(X)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        self.batches += 1
+        if self.batch_histogram is not None:
+            self.batch_histogram.observe(len(X))
+
+        start = 0
+        for X_part, future in batch:
+            future.set_result(predictions[start:start + len(X_part)])
+            start += len(X_part)
+
+
+class PredictionService:
+    """
+    Local prediction service holding warm EventPredictor models.
+
+    Endpoints:
+        POST /predict  {"model": name, "records": [...]} -> {"predictions": [...]}
+        GET  /metrics  latency and batch-size histograms and counters
+        GET  /health   liveness check
+    """
+
+    LATENCY_BOUNDS_MS = (0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+    BATCH_BOUNDS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 8765,
+                 max_batch_rows: int = 1024, max_wait_ms: float = 2.0):
+        """
+        Initialize the service
+
+        Args:
+            host (str): Interface to bind
+            port (int): Port to bind (0 picks a free port)
+            max_batch_rows (int): Maximum rows per micro-batch
+            max_wait_ms (float): Maximum wait for more requests per batch
+        """
+        self.logger = logging.getLogger(__name__)
+        self.host = host
+        self.port = port
+        self.max_batch_rows = max_batch_rows
+        self.max_wait_ms = max_wait_ms
+
+        self.models = {}
+        self.batchers = {}
+        self.latency_histogram = Histogram(self.LATENCY_BOUNDS_MS)
+        self.batch_histogram = Histogram(self.BATCH_BOUNDS)
+        self.request_count = 0
+        self.error_count = 0
+        self._counter_lock = threading.Lock()
+
+        self._server = None
+        self._server_thread = None
+
+    def add_model(self, name: str, predictor: EventPredictor):
+        """
+        Register a trained predictor under a name
+
+        Args:
+            name (str): Model name used in requests
+            predictor (EventPredictor): Trained predictor
+        """
+        if not predictor.is_trained:
+            raise ValueError("Only trained predictors can be served")
+
+        if name in self.batchers:
+            self.batchers[name].close()
+
+        # Warm up the compiled inference path before serving traffic
+        predictor.compile_model()
+
+        self.models[name] = predictor
+        self.batchers[name] = MicroBatcher(
+            predictor,
+            max_batch_rows=self.max_batch_rows,
+            max_wait_ms=self.max_wait_ms,
+            batch_histogram=self.batch_histogram
+        )
+        self.logger.info(f"Serving model '{name}' (version {predictor.model_version})")
+
+    def load_model(self, name: str, path: str):
+        """
+        Load a model artifact directory or joblib file and serve it
+
+        Args:
+            name (str): Model name used in requests
+            path (str): Artifact directory (memory-mapped) or joblib file
+        """
+        predictor = EventPredictor()
+        if path.endswith('.joblib') or path.endswith('.pkl'):
+            predictor.load_model(path)
+        else:
+            predictor.load_artifact(path, mmap_mode='r')
+        self.add_model(name, predictor)
+
+    def predict(self, records: List[Dict], model: str = 'default') -> np.ndarray:
+        """
+        Predict for raw records through the micro-batcher
+
+        Feature engineering runs in the calling thread; only the model
+        evaluation is batched across concurrent callers.
+
+        Args:
+            records (List[Dict]): Rows in the EventPredictor input schema
+                (include preceding periods so lagged features are correct)
+            model (str): Model name
+
+        Returns:
+            np.ndarray: Predictions, one per record
+        """
+        start = time.perf_counter()
+        try:
+            if model not in self.models:
+                raise KeyError(f"Unknown model: {model}")
+
+            predictor = self.models[model]
+            X, _ = predictor.build_feature_matrix(pd.DataFrame(records), predictor.feature_columns)
+
+            predictions = self.batchers[model].submit(X).result()
+        except Exception:
+            with self._counter_lock:
+                self.error_count += 1
+            raise
+        finally:
+            with self._counter_lock:
+                self.request_count += 1
+            self.latency_histogram.observe((time.perf_counter() - start) * 1000)
+
+        return predictions
+
+    def metrics(self) -> Dict:
+        """Service counters and histograms"""
+        return {
+            'requests': self.request_count,
+            'errors': self.error_count,
+            'batches': sum(b.batches for b in self.batchers.values()),
+            'models': {name: p.model_version for name, p in self.models.items()},
+            'latency_ms': self.latency_histogram.snapshot(),
+            'batch_rows': self.batch_histogram.snapshot()
+        }
+
+    def start(self) -> str:
+        """
+        Start serving HTTP in a background thread
+
+        Returns:
+            str: Base URL of the service
+        """
+        self._server = _HTTPServer((self.host, self.port), self._make_handler())
+        self.port = self._server.server_address[1]
+
+        self._server_thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._server_thread.start()
+
+        url = f"http://{self.host}:{self.port}"
+        self.logger.info(f"Prediction service listening on {url}")
+        return url
+
+    def stop(self):
+        """Stop the HTTP server and the batchers"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server_thread.join()
+            self._server = None
+
+        for batcher in self.batchers.values():
+            batcher.close()
+        self.batchers = {}
+
+    def _make_handler(self):
+        """Build the request handler class bound to this service"""
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _send_json(self, status, payload):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path == '/metrics':
+                    self._send_json(200, service.metrics())
+                elif self.path == '/health':
+                    self._send_json(200, {'status': 'ok', 'models': list(service.models)})
+                else:
+                    self._send_json(404, {'error': 'Not found'})
+
+            def do_POST(self):
+                if self.path != '/predict':
+                    self._send_json(404, {'error': 'Not found'})
+                    return
+
+                try:
+                    length = int(self.headers.get('Content-Length', 0))
+                    request = json.loads(self.rfile.read(length))
+                    predictions = service.predict(
+                        request['records'], model=request.get('model', 'default')
+                    )
+                    self._send_json(200, {'predictions': predictions.tolist()})
+                except Exception as e:
+                    self._send_json(400, {'error': str(e)})
+
+            def log_message(self, format, *args):
+                service.logger.debug(format % args)
+
+        return Handler
+
+
+def run_load_test(url: str, payload: Dict, concurrency: int = 8, n_requests: int = 200) -> Dict:
+    """
+    Measure service throughput and latency under concurrent load
+
+    Args:
+        url (str): Base URL of the service
+        payload (Dict): Request body sent to /predict
+        concurrency (int): Number of concurrent client threads
+        n_requests (int): Total requests to send
+
+    Returns:
+        Dict: Throughput (requests and rows per second) and latency percentiles
+    """
+    body = json.dumps(payload).encode()
+    rows_per_request = len(payload.get('records', []))
+
+    def send(_):
+        start = time.perf_counter()
+        request = urllib.request.Request(
+            f"{url}/predict", data=body, headers={'Content-Type': 'application/json'}
+        )
+        try:
+            with urllib.request.urlopen(request) as response:
+                response.read()
+            ok = True
+        except Exception:
+            ok = False
+        return time.perf_counter() - start, ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(send, range(n_requests)))
+    elapsed = time.perf_counter() - start
+
+    latencies = np.array([latency for latency, _ in results]) * 1000
+    errors = sum(1 for _, ok in results if not ok)
+
+    return {
+        'requests': n_requests,
+        'concurrency': concurrency,
+        'errors': errors,
+        'seconds': round(elapsed, 3),
+        'requests_per_second': round(n_requests / elapsed, 1),
+        'rows_per_second': round(n_requests * rows_per_request / elapsed, 1),
+        'p50_ms': round(float(np.percentile(latencies, 50)), 2),
+        'p95_ms': round(float(np.percentile(latencies, 95)), 2),
+        'p99_ms': round(float(np.percentile(latencies, 99)), 2)
+    }
+
+
+# Example usage and testing
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve EventPredictor models over HTTP")
+    parser.add_argument('model_path', help="Model artifact directory or joblib file")
+    parser.add_argument('--name', default='default')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--max-batch-rows', type=int, default=1024)
+    parser.add_argument('--max-wait-ms', type=float, default=2.0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    service = PredictionService(args.host, args.port, args.max_batch_rows, args.max_wait_ms)
+    service.load_model(args.name, args.model_path)
+    print(f"Serving on {service.start()} (Ctrl+C to stop)")
+
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        service.stop()
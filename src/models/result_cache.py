@@ -0,0 +1,222 @@
+"""
+Result Cache Module
+Bounded LRU cache with optional on-disk persistence for model outputs
+
+Author: Gabriel Demetrios Lafis
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Sequence
+
+
+class ResultCache:
+    """
+    In-memory LRU cache, optionally backed by a SQLite file.
+
+    Every cache is bound to a version (model version, lexicon version, ...)
+    and only serves entries of that version, so stale results can never be
+    served. Switching versions empties the in-memory LRU; on disk, rows are
+    keyed by (version, key) and left in place, so several models can share
+    one SQLite file. The file is bounded by evicting its least recently
+    used rows. Values must be JSON-serializable when on-disk persistence
+    is enabled.
+    """
+
+    def __init__(self, max_entries: int = 100000, cache_path: Optional[str] = None,
+                 max_disk_entries: Optional[int] = None):
+        """
+        Initialize the cache
+
+        Args:
+            max_entries (int): Maximum entries kept in memory
+            cache_path (Optional[str]): SQLite file for persistence (None disables)
+            max_disk_entries (Optional[int]): Maximum rows kept on disk across
+                all versions (default: 10 x max_entries)
+        """
+        self.logger = logging.getLogger(__name__)
+        self.max_entries = max_entries
+        self.cache_path = cache_path
+        self.max_disk_entries = max_disk_entries or 10 * max_entries
+        self.version = None
+
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+
+        if cache_path:
+            directory = os.path.dirname(cache_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(cache_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "version TEXT, key TEXT, value TEXT, accessed REAL DEFAULT 0, "
+                "PRIMARY KEY (version, key))"
+            )
+            columns = [row[1] for row in self._db.execute("PRAGMA table_info(results)")]
+            if 'accessed' not in columns:
+                # Files written before LRU eviction
+                self._db.execute("ALTER TABLE results ADD COLUMN accessed REAL DEFAULT 0")
+            self._db.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)")
+            self._db.commit()
+
+    def ensure_version(self, version: Hashable):
+        """
+        Bind the cache to a version; entries of other versions stop being served
+
+        Args:
+            version (Hashable): Current model/lexicon version
+        """
+        if version == self.version:
+            return
+
+        with self._lock:
+            self._memory.clear()
+            self.version = version
+
+        self.logger.debug(f"Result cache bound to version {version}")
+
+    def get(self, key: Hashable) -> Any:
+        """
+        Look up one entry
+
+        Args:
+            key (Hashable): Entry key
+
+        Returns:
+            Any: Cached value or None on a miss
+        """
+        return self.get_many([key])[0]
+
+    def get_many(self, keys: Sequence[Hashable]) -> List[Any]:
+        """
+        Look up several entries
+
+        Args:
+            keys (Sequence[Hashable]): Entry keys
+
+        Returns:
+            List[Any]: Cached values, None for misses
+        """
+        values = [None] * len(keys)
+        missing = []
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    values[i] = self._memory[key]
+                else:
+                    missing.append(i)
+
+            if missing and self._db is not None:
+                stored = {}
+                for start in range(0, len(missing), 500):
+                    chunk = [str(keys[i]) for i in missing[start:start + 500]]
+                    rows = self._db.execute(
+                        f"SELECT key, value FROM results WHERE version = ? "
+                        f"AND key IN ({','.join('?' * len(chunk))})",
+                        [str(self.version)] + chunk
+                    ).fetchall()
+                    stored.update(rows)
+
+                found_keys = []
+                for i in missing:
+                    if str(keys[i]) in stored:
+                        values[i] = json.loads(stored[str(keys[i])])
+                        self._store(keys[i], values[i])
+                        self.disk_hits += 1
+                        found_keys.append(str(keys[i]))
+
+                if found_keys:
+                    now = time.time()
+                    self._db.executemany(
+                        "UPDATE results SET accessed = ? WHERE version = ? AND key = ?",
+                        [(now, str(self.version), key) for key in found_keys]
+                    )
+                    self._db.commit()
+
+            found = sum(1 for value in values if value is not None)
+            self.hits += found
+            self.misses += len(keys) - found
+
+        return values
+
+    def put(self, key: Hashable, value: Any):
+        """Store one entry"""
+        self.put_many([key], [value])
+
+    def put_many(self, keys: Sequence[Hashable], values: Sequence[Any]):
+        """
+        Store several entries
+
+        Args:
+            keys (Sequence[Hashable]): Entry keys
+            values (Sequence[Any]): Values to cache
+        """
+        with self._lock:
+            for key, value in zip(keys, values):
+                self._store(key, value)
+
+            if self._db is not None:
+                now = time.time()
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO results (version, key, value, accessed) VALUES (?, ?, ?, ?)",
+                    [(str(self.version), str(key), json.dumps(value), now) for key, value in zip(keys, values)]
+                )
+                self._evict_disk()
+                self._db.commit()
+
+    def clear(self):
+        """Remove all entries and reset the counters"""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM results")
+                self._db.commit()
+            self.hits = self.misses = self.disk_hits = 0
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and size"""
+        lookups = self.hits + self.misses
+        return {
+            'version': self.version,
+            'entries': len(self._memory),
+            'hits': self.hits,
+            'misses': self.misses,
+            'disk_hits': self.disk_hits,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+    def close(self):
+        """Close the on-disk store"""
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def _evict_disk(self):
+        """Delete the least recently used rows above ``max_disk_entries`` (lock held)"""
+        excess = self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0] - self.max_disk_entries
+        if excess > 0:
+            self._db.execute(
+                "DELETE FROM results WHERE rowid IN "
+                "(SELECT rowid FROM results ORDER BY accessed LIMIT ?)",
+                (excess,)
+            )
+
+    def _store(self, key: Hashable, value: Any):
+        """Insert into the LRU, evicting the oldest entries (lock held)"""
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
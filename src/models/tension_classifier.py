@@ -0,0 +1,254 @@
+"""
+Tension Classifier Module
+Out-of-core learned tension classifier on hashed text features
+
+Author: Gabriel Demetrios Lafis
+"""
+
+import glob
+import json
+import logging
+import os
+import uuid
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, Iterator, Optional, Sequence, Tuple, Union
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.naive_bayes import MultinomialNB
+
+
+class TensionClassifier:
+    """
+    Multinomial Naive Bayes tension classifier over hashed word n-grams.
+
+    The hashing vectorizer is stateless, so training needs no vocabulary
+    pass and runs out-of-core with ``partial_fit`` over chunks streamed
+    from disk. A text's tension score is the expected class score under
+    the predicted class probabilities. Saved models are plain ``.npy``
+    arrays that can be memory-mapped for inference.
+    """
+
+    FORMAT_VERSION = 1
+    # The vectorizer lowercases and tokenizes, so case and spacing never change a score
+    normalizes_text = True
+
+    def __init__(self, n_features: int = 2 ** 20, ngram_range: Tuple[int, int] = (1, 2),
+                 alpha: float = 0.1, class_scores: Optional[Dict] = None):
+        """
+        Initialize the classifier
+
+        Args:
+            n_features (int): Hashed feature space size
+            ngram_range (Tuple[int, int]): Word n-gram range
+            alpha (float): Additive smoothing
+            class_scores (Optional[Dict]): Class label -> tension score (0-100);
+                numeric labels are used as their own score when omitted
+        """
+        self.logger = logging.getLogger(__name__)
+        self.n_features = n_features
+        self.ngram_range = tuple(ngram_range)
+        self.alpha = alpha
+        self.class_scores = dict(class_scores) if class_scores else None
+
+        self.vectorizer = self._make_vectorizer()
+        self.model = MultinomialNB(alpha=alpha)
+        self.classes_ = None
+        self.n_samples_seen = 0
+        self.version = None
+
+        # Inference arrays (taken from the fitted model or memory-mapped on load)
+        self._feature_log_prob = None
+        self._class_log_prior = None
+        self._score_vector = None
+
+    def _make_vectorizer(self) -> HashingVectorizer:
+        """Stateless term-count vectorizer"""
+        return HashingVectorizer(n_features=self.n_features, ngram_range=self.ngram_range,
+                                 alternate_sign=False, norm=None)
+
+    def partial_fit(self, texts: Sequence[str], labels: Sequence, classes: Optional[Sequence] = None) -> 'TensionClassifier':
+        """
+        Update the model with one batch of labelled texts
+
+        Args:
+            texts (Sequence[str]): Texts
+            labels (Sequence): Tension class per text
+            classes (Optional[Sequence]): All class labels (required on the first call)
+
+        Returns:
+            TensionClassifier: self
+        """
+        if self.model is None:
+            raise ValueError("Classifier was loaded for inference only and cannot be trained further")
+        if self.classes_ is None and classes is None:
+            raise ValueError("classes must be given on the first partial_fit call")
+
+        X = self.vectorizer.transform(texts)
+        self.model.partial_fit(X, np.asarray(labels), classes=None if self.classes_ is not None else np.asarray(classes))
+
+        self.classes_ = self.model.classes_
+        self.n_samples_seen += len(texts)
+        self._feature_log_prob = self.model.feature_log_prob_
+        self._class_log_prior = self.model.class_log_prior_
+        self._score_vector = self._class_score_vector()
+        self.version = uuid.uuid4().hex[:12]
+
+        return self
+
+    def fit_stream(self, source: Union[str, Iterable], classes: Sequence, text_column: str = 'text',
+                   label_column: str = 'label', chunksize: int = 10000) -> 'TensionClassifier':
+        """
+        Train out-of-core on labelled texts streamed from disk
+
+        Args:
+            source: CSV/JSONL file, directory or glob (optionally gzipped), or
+                an iterable of DataFrame chunks
+            classes (Sequence): All class labels
+            text_column (str): Column holding the text
+            label_column (str): Column holding the label
+            chunksize (int): Rows per partial_fit batch
+
+        Returns:
+            TensionClassifier: self
+        """
+        chunks = self.iter_labelled_chunks(source, chunksize) if isinstance(source, str) else source
+
+        for chunk in chunks:
+            chunk = chunk.dropna(subset=[text_column, label_column])
+            if len(chunk):
+                self.partial_fit(chunk[text_column].astype(str).tolist(), chunk[label_column].to_numpy(), classes)
+
+        self.logger.info(f"Tension classifier trained on {self.n_samples_seen} texts")
+        return self
+
+    @staticmethod
+    def iter_labelled_chunks(source: str, chunksize: int = 10000) -> Iterator[pd.DataFrame]:
+        """
+        Lazily read labelled text files one chunk at a time
+
+        Args:
+            source (str): File, directory or glob of .csv/.jsonl files (.gz allowed)
+            chunksize (int): Rows per chunk
+
+        Yields:
+            pd.DataFrame: Chunks of rows
+        """
+        if os.path.isdir(source):
+            paths = sorted(glob.glob(os.path.join(source, '*.csv*')) + glob.glob(os.path.join(source, '*.jsonl*')))
+        else:
+            paths = sorted(glob.glob(source))
+
+        for path in paths:
+            if '.jsonl' in path or '.json' in path:
+                yield from pd.read_json(path, lines=True, chunksize=chunksize)
+            else:
+                yield from pd.read_csv(path, chunksize=chunksize)
+
+    def _class_score_vector(self) -> np.ndarray:
+        """Tension score of every class, in model class order"""
+        if self.class_scores is not None:
+            missing = [label for label in self.classes_ if label not in self.class_scores]
+            if missing:
+                raise ValueError(f"No tension score for classes: {missing}")
+            return np.array([self.class_scores[label] for label in self.classes_], dtype=np.float64)
+
+        try:
+            return np.asarray(self.classes_, dtype=np.float64)
+        except (TypeError, ValueError):
+            raise ValueError("Non-numeric class labels need class_scores")
+
+    def predict_proba(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Class probabilities for a batch of texts
+
+        Args:
+            texts (Sequence[str]): Texts
+
+        Returns:
+            np.ndarray: (n_texts, n_classes) probabilities
+        """
+        if self._feature_log_prob is None:
+            raise ValueError("Classifier is not trained")
+
+        X = self.vectorizer.transform(texts)
+        joint = np.asarray(X @ self._feature_log_prob.T, dtype=np.float64) + self._class_log_prior
+        joint -= joint.max(axis=1, keepdims=True)
+        proba = np.exp(joint)
+
+        return proba / proba.sum(axis=1, keepdims=True)
+
+    def predict(self, texts: Sequence[str]) -> np.ndarray:
+        """Most likely class per text"""
+        return np.asarray(self.classes_)[self.predict_proba(texts).argmax(axis=1)]
+
+    def score(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Expected tension score (0-100) per text
+
+        Args:
+            texts (Sequence[str]): Texts
+
+        Returns:
+            np.ndarray: Tension scores
+        """
+        return self.predict_proba(texts) @ self._score_vector
+
+    def save(self, directory: str):
+        """
+        Save the inference arrays as uncompressed .npy files plus a JSON header
+
+        Args:
+            directory (str): Artifact directory (created if missing)
+        """
+        if self._feature_log_prob is None:
+            raise ValueError("Classifier is not trained")
+
+        os.makedirs(directory, exist_ok=True)
+        # Transposed so inference reads one contiguous (n_features, n_classes) block
+        np.save(os.path.join(directory, 'feature_log_prob.npy'),
+                np.ascontiguousarray(self._feature_log_prob.T, dtype=np.float32))
+        np.save(os.path.join(directory, 'class_log_prior.npy'), np.asarray(self._class_log_prior, dtype=np.float64))
+
+        header = {
+            'format_version': self.FORMAT_VERSION,
+            'n_features': self.n_features,
+            'ngram_range': list(self.ngram_range),
+            'alpha': self.alpha,
+            'classes': np.asarray(self.classes_).tolist(),
+            'class_scores': self._score_vector.tolist(),
+            'n_samples_seen': self.n_samples_seen,
+            'version': self.version
+        }
+        with open(os.path.join(directory, 'metadata.json'), 'w') as f:
+            json.dump(header, f, indent=2)
+
+    @classmethod
+    def load(cls, directory: str, mmap_mode: Optional[str] = 'r') -> 'TensionClassifier':
+        """
+        Load a classifier saved with ``save`` for inference
+
+        Args:
+            directory (str): Artifact directory
+            mmap_mode (Optional[str]): numpy mmap mode ('r' shares pages
+                between processes, None loads into memory)
+
+        Returns:
+            TensionClassifier: Inference-only classifier
+        """
+        with open(os.path.join(directory, 'metadata.json')) as f:
+            header = json.load(f)
+
+        if header.get('format_version') != cls.FORMAT_VERSION:
+            raise ValueError(f"Unsupported classifier format: {header.get('format_version')}")
+
+        classifier = cls(n_features=header['n_features'], ngram_range=header['ngram_range'],
+                         alpha=header['alpha'], class_scores=dict(zip(header['classes'], header['class_scores'])))
+        classifier.model = None
+        classifier.classes_ = np.asarray(header['classes'])
+        classifier.n_samples_seen = header['n_samples_seen']
+        classifier.version = header['version']
+        classifier._feature_log_prob = np.load(os.path.join(directory, 'feature_log_prob.npy'), mmap_mode=mmap_mode).T
+        classifier._class_log_prior = np.load(os.path.join(directory, 'class_log_prior.npy'))
+        classifier._score_vector = np.asarray(header['class_scores'], dtype=np.float64)
+
+        return classifier
@@ -8,6 +8,9 @@ Author: Gabriel Demetrios Lafis
 import unittest
 import sys
 import os
+import tempfile
+import json
+import gzip
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
 
 import pandas as pd
@@ -15,6 +18,39 @@ import numpy as np
 from main import GeopoliticalRiskAnalyzer
 from analysis.world_war_analyzer import WorldWarRiskAnalyzer
 from models.military_analyzer import MilitaryPowerAnalyzer
+from models.event_predictor import EventPredictor
+from models.prediction_service import PredictionService, run_load_test
+from models.network_analyzer import NetworkAnalyzer
+from models.narrative_analyzer import NarrativeAnalyzer
+from models.gti_stream import GTIAccumulator
+from models.near_duplicates import NearDuplicateDetector
+from models.embedding_scorer import EmbeddingScorer
+from models.result_cache import ResultCache
+from data_ingestion.news_archive import NewsArchiveReader
+
+
+def make_event_data(n_countries=4, n_periods=36, seed=0):
+    """Generate monthly conflict data in the EventPredictor schema"""
+    rng = np.random.RandomState(seed)
+    countries = ['USA', 'CHN', 'RUS', 'UKR', 'IRN', 'ISR', 'IND', 'PAK'][:n_countries]
+    regions = {'USA': 'Americas', 'CHN': 'Asia', 'RUS': 'Europe', 'UKR': 'Europe',
+               'IRN': 'Middle East', 'ISR': 'Middle East', 'IND': 'Asia', 'PAK': 'Asia'}
+    dates = pd.date_range('2020-01-01', periods=n_periods, freq='MS')
+    
+    rows = []
+    for i, country in enumerate(countries):
+        level = 5 + 20 * i
+        for date in dates:
+            rows.append({
+                'country': country,
+                'region': regions[country],
+                'date': date.strftime('%Y-%m-%d'),
+                'fatalities': float(rng.poisson(level)),
+                'gdp_per_capita': 10000 + 500 * i + rng.normal(0, 100),
+                'polity_score': float(rng.randint(-10, 11))
+            })
+    
+    return pd.DataFrame(rows)
 
 class TestGeopoliticalRiskAnalyzer(unittest.TestCase):
     """Test cases for the main risk analyzer"""
@@ -205,6 +241,765 @@ class TestMilitaryAnalyzer(unittest.TestCase):
         self.assertIn('military_balance', balance)
         self.assertIn('power_ratio', balance)
 
+class TestEventPredictor(unittest.TestCase):
+    """Test cases for the event prediction model"""
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.data = make_event_data()
+        self.predictor = EventPredictor()
+        self.predictor.model_params['n_estimators'] = 20
+    
+    def test_walk_forward_backtest(self):
+        """Test that backtest windows only train on past periods"""
+        report = self.predictor.backtest(self.data, n_windows=3, n_jobs=1)
+        
+        self.assertEqual(report['n_windows'], 3)
+        for window in report['windows']:
+            self.assertLess(window['train_end'], window['test_start'])
+            self.assertGreater(window['rmse'], 0)
+        
+        rolling = self.predictor.backtest(
+            self.data, n_windows=3, window_type='rolling', window_size=12, n_jobs=2
+        )
+        self.assertTrue(all(w['n_train'] <= 12 * 4 for w in rolling['windows']))
+        self.assertEqual(rolling['windows'][-1]['n_train'], 12 * 4)
+        self.assertEqual(len(self.predictor._feature_cache), 1)
+        
+        # Features of past periods must not depend on later targets
+        shocked = self.data.copy()
+        shocked.loc[shocked['date'] >= '2022-06-01', 'fatalities'] = 1e6
+        past = (self.data['date'] < '2022-06-01').to_numpy()
+        X, _ = self.predictor.build_feature_matrix(self.data)
+        X_shocked, _ = self.predictor.build_feature_matrix(shocked)
+        np.testing.assert_array_equal(X[past], X_shocked[past])
+    
+    def test_incremental_update(self):
+        """Test warm-start updates, drift refits and scheduled retrains"""
+        history = self.data[self.data['date'] < '2022-12-01']
+        self.predictor.train(history)
+        
+        summary = self.predictor.update(self.data, drift_threshold=100, n_new_estimators=5)
+        self.assertEqual(summary['mode'], 'warm_start')
+        self.assertEqual(summary['n_estimators'], 25)
+        self.assertEqual(summary['new_rows'], 4)
+        self.assertEqual(self.predictor.update(self.data)['mode'], 'none')
+        
+        self.predictor.train(history)
+        summary = self.predictor.update(self.data, drift_threshold=0)
+        self.assertEqual(summary['mode'], 'recent_refit')
+        # Baseline is the refit model's held-out error, not the old model's drift
+        self.assertEqual(self.predictor.baseline_rmse, summary['baseline_rmse'])
+        self.assertNotEqual(summary['baseline_rmse'], summary['new_rmse'])
+        
+        summary = self.predictor.update(self.data, full_retrain_every=2)
+        self.assertEqual(summary['mode'], 'full_retrain')
+    
+    def test_mmap_artifact_roundtrip(self):
+        """Test that memory-mapped artifacts reproduce model predictions"""
+        self.predictor.train(self.data)
+        expected = self.predictor.predict(self.data)
+        
+        with tempfile.TemporaryDirectory() as directory:
+            self.predictor.save_artifact(directory)
+            
+            loaded = EventPredictor()
+            loaded.load_artifact(directory)
+            
+            self.assertIsInstance(loaded.model.threshold, np.memmap)
+            # Compiled inference maps the saved arrays instead of rebuilding them
+            loaded.compile_model()
+            self.assertIsInstance(loaded.model._compiled['left'], np.memmap)
+            self.assertEqual(loaded.model._compiled['max_depth'], self.predictor.model_params['max_depth'])
+            np.testing.assert_array_equal(loaded.predict(self.data.iloc[:3]), expected[:3])
+            self.assertEqual(loaded.feature_columns, self.predictor.feature_columns)
+            self.assertEqual(loaded.model_version, self.predictor.model_version)
+            np.testing.assert_array_equal(loaded.predict(self.data), expected)
+            self.assertEqual(len(loaded.get_feature_importance()), len(loaded.feature_columns))
+            del loaded
+    
+    def test_successive_halving_tuning(self):
+        """Test that tuning keeps and persists the best configuration"""
+        grid = {'max_depth': [2, 3], 'n_estimators': [10, 20], 'learning_rate': [0.1]}
+        
+        with tempfile.TemporaryDirectory() as directory:
+            save_path = os.path.join(directory, 'best_model.joblib')
+            report = self.predictor.tune(self.data, param_grid=grid, factor=2, n_jobs=1,
+                                         save_path=save_path)
+            
+            self.assertTrue(os.path.exists(save_path))
+            self.assertTrue(os.path.exists(save_path + '.report.json'))
+        
+        self.assertEqual(report['n_candidates'], 4)
+        self.assertGreater(report['rounds'][-1]['n_samples'], report['rounds'][0]['n_samples'])
+        self.assertEqual(self.predictor.model.max_depth, report['best_params']['max_depth'])
+        self.assertTrue(self.predictor.is_trained)
+    
+    def test_streaming_training(self):
+        """Test out-of-core training over per-country partitions"""
+        with tempfile.TemporaryDirectory() as directory:
+            for country, partition in self.data.groupby('country'):
+                partition.to_csv(os.path.join(directory, f"{country}.csv"), index=False)
+            
+            metrics = self.predictor.train_streaming(directory, n_epochs=3)
+            columns = self.predictor.feature_columns
+            
+            # Chunks that split a country's history keep its lags intact
+            chunked = EventPredictor()
+            chunked.train_streaming(directory, chunksize=10)
+            for attribute in ('mean_', 'var_'):
+                np.testing.assert_allclose(getattr(chunked.model.named_steps['scaler'], attribute),
+                                           getattr(self.predictor.model.named_steps['scaler'], attribute))
+            
+            # Only rows scored before being learned count towards the RMSE
+            single = EventPredictor().train_streaming(directory, n_epochs=1)
+            self.assertEqual(single['n_scored'], len(self.data) - 36)
+            with self.assertRaises(ValueError):
+                self.predictor.train_streaming(directory, n_epochs=0)
+            self.assertEqual(self.predictor.feature_columns, columns)
+        
+        self.assertEqual(metrics['n_rows'], len(self.data))
+        self.assertEqual(self.predictor.model_type, 'sgd')
+        self.assertTrue(np.isfinite(metrics['rmse']))
+        
+        # Per-partition features match a build over the full dataset
+        chunk = self.data[self.data['country'] == 'RUS']
+        regional_means = self.data.groupby(['region', pd.to_datetime(self.data['date'])])['fatalities'].mean()
+        X_chunk, _ = self.predictor.build_feature_matrix(chunk, columns, regional_means=regional_means)
+        X_full, _ = self.predictor.build_feature_matrix(self.data, columns)
+        np.testing.assert_array_equal(X_chunk, X_full[(self.data['country'] == 'RUS').to_numpy()])
+        
+        predictions = self.predictor.predict(self.data)
+        self.assertEqual(len(predictions), len(self.data))
+        self.assertEqual(len(self.predictor.get_feature_importance()), len(self.predictor.feature_columns))
+    
+    def test_permutation_importance(self):
+        """Test permutation importance intervals and per-version caching"""
+        self.predictor.train(self.data)
+        importance = self.predictor.get_permutation_importance(self.data, n_repeats=3, n_jobs=2)
+        
+        self.assertEqual(set(importance['feature']), set(self.predictor.feature_columns))
+        self.assertTrue((importance['ci_lower'] <= importance['ci_upper']).all())
+        # Country conflict levels are encoded in the synthetic GDP offsets
+        self.assertEqual(importance.iloc[0]['feature'], 'gdp_per_capita')
+        
+        self.predictor.get_permutation_importance(self.data, n_repeats=3, n_jobs=2)
+        self.assertEqual(len(self.predictor._importance_cache), 1)
+        
+        self.predictor.train(self.data)
+        self.predictor.get_permutation_importance(self.data, n_repeats=3, n_jobs=1)
+        self.assertEqual(len(self.predictor._importance_cache), 1)
+    
+    def test_prediction_cache(self):
+        """Test cached predictions, hit counters and invalidation on retrain"""
+        self.predictor.train(self.data)
+        expected = self.predictor.predict(self.data)
+        
+        with tempfile.TemporaryDirectory() as directory:
+            self.predictor.enable_prediction_cache(cache_path=os.path.join(directory, 'cache.db'))
+            np.testing.assert_array_equal(self.predictor.predict(self.data), expected)
+            np.testing.assert_array_equal(self.predictor.predict(self.data), expected)
+            self.predictor.predict_risk_level(self.data)
+            
+            stats = self.predictor.get_cache_stats()
+            self.assertEqual(stats['misses'], len(self.data))
+            self.assertEqual(stats['hits'], 2 * len(self.data))
+            
+            self.predictor.train(self.data)
+            self.assertEqual(self.predictor.get_cache_stats()['entries'], 0)
+            self.predictor.prediction_cache.close()
+    
+    def test_shared_cache_file_keeps_versions(self):
+        """Test that predictors sharing a cache file do not wipe each other's entries"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'cache.db')
+            first = ResultCache(cache_path=path, max_disk_entries=5)
+            second = ResultCache(cache_path=path, max_disk_entries=5)
+            first.ensure_version('model-a')
+            second.ensure_version('model-b')
+            
+            first.put_many(['x', 'y'], [1.0, 2.0])
+            second.put_many(['x'], [3.0])
+            first.ensure_version('model-a2')
+            first.ensure_version('model-a')
+            self.assertEqual(first.get_many(['x', 'y']), [1.0, 2.0])
+            self.assertEqual(first.disk_hits, 2)
+            
+            # Least recently used rows are evicted once the file is full
+            second.put_many(['p', 'q', 'r'], [4.0, 5.0, 6.0])
+            reader = ResultCache(cache_path=path)
+            reader.ensure_version('model-b')
+            self.assertEqual(reader.get_many(['x', 'p']), [None, 4.0])
+            reader.ensure_version('model-a')
+            self.assertEqual(reader.get_many(['x', 'y']), [1.0, 2.0])
+            for cache in (first, second, reader):
+                cache.close()
+    
+    def test_float32_feature_matrix(self):
+        """Test float32 matrices halve memory without changing predictions"""
+        X, columns = self.predictor.build_feature_matrix(self.data)
+        self.assertEqual(X.dtype, np.float32)
+        self.assertTrue(X.flags['C_CONTIGUOUS'])
+        self.assertEqual(columns[:2], ['gdp_per_capita', 'polity_score'])
+        
+        parity = self.predictor.check_precision_parity(self.data)
+        self.assertEqual(parity['max_abs_diff'], 0.0)
+        self.assertEqual(parity['nbytes_float64'], 2 * parity['nbytes_float32'])
+    
+    def test_multi_horizon_forecast(self):
+        """Test one-call country x horizon forecasts"""
+        targets = self.predictor.build_horizon_targets(self.data, horizons=(1, 3))
+        usa = self.data['country'] == 'USA'
+        np.testing.assert_array_equal(targets[usa.to_numpy()][:-3, 1], self.data.loc[usa, 'fatalities'].to_numpy()[3:])
+        self.assertTrue(np.isnan(targets[usa.to_numpy()][-1]).all())
+        
+        metrics = self.predictor.train_multi_horizon(self.data, n_jobs=2)
+        self.assertEqual(set(metrics['horizons']), {1, 3, 6})
+        # 36 periods, 28 before the holdout; each horizon purges its last h periods
+        for horizon, horizon_metrics in metrics['horizons'].items():
+            self.assertEqual(horizon_metrics['n_train'], (28 - horizon) * 4)
+        
+        forecast = self.predictor.predict_horizons(self.data)
+        self.assertEqual(forecast.shape, (4, 3))
+        self.assertEqual(list(forecast.columns), ['1m', '3m', '6m'])
+        self.assertIn('RUS', forecast.index)
+    
+    def test_spatial_lag_features(self):
+        """Test neighbour-weighted conflict lags from network adjacency"""
+        networks = NetworkAnalyzer()
+        networks.load_alliance_data(pd.DataFrame({
+            'country1_iso': ['USA', 'RUS'], 'country2_iso': ['UKR', 'CHN']
+        }), 'dataframe')
+        networks.load_contiguity_data(pd.DataFrame({
+            'country1_iso': ['RUS', 'RUS'], 'country2_iso': ['UKR', 'CHN']
+        }), 'dataframe')
+        
+        self.predictor.set_spatial_weights(networks, networks=('contiguity', 'alliance'))
+        X, columns = self.predictor.build_feature_matrix(self.data)
+        self.assertIn('contiguity_conflict_lag', columns)
+        
+        # RUS borders UKR and CHN: previous-period average of both
+        rus = np.flatnonzero((self.data['country'] == 'RUS').to_numpy())[5]
+        previous = self.data['date'] == self.data.iloc[rus - 1]['date']
+        expected = self.data[previous & self.data['country'].isin(['UKR', 'CHN'])]['fatalities'].mean()
+        self.assertAlmostEqual(X[rus, columns.index('contiguity_conflict_lag')], expected, places=3)
+        
+        self.predictor.train(self.data)
+        self.assertIn('alliance_conflict_lag', self.predictor.feature_columns)
+        
+        # Single-country requests get neighbour lags from the training history
+        columns = ['contiguity_conflict_lag', 'alliance_conflict_lag']
+        X_full, _ = self.predictor.build_feature_matrix(self.data, columns)
+        rus_rows = (self.data['country'] == 'RUS').to_numpy()
+        X_rus, _ = self.predictor.build_feature_matrix(self.data[rus_rows], columns)
+        np.testing.assert_array_equal(X_rus, X_full[rus_rows])
+        self.assertGreater(X_rus[1:].min(), 0)
+        
+        with tempfile.TemporaryDirectory() as directory:
+            self.predictor.save_artifact(directory)
+            loaded = EventPredictor()
+            loaded.load_artifact(directory)
+            X_loaded, _ = loaded.build_feature_matrix(self.data[rus_rows], columns)
+            np.testing.assert_array_equal(X_loaded, X_full[rus_rows])
+            del loaded
+        
+        # Training features never use the history recorded by an earlier fit
+        first = self.data[self.data['country'].isin(['UKR', 'CHN'])]
+        second = self.data[self.data['country'].isin(['RUS', 'USA'])]
+        fresh = EventPredictor()
+        fresh.model_params['n_estimators'] = 20
+        fresh.set_spatial_weights(networks, networks=('contiguity', 'alliance'))
+        self.predictor.train(first)
+        self.predictor.train_multi_horizon(first, n_jobs=1)
+        for predictor in (self.predictor, fresh):
+            predictor.train(second)
+            predictor.train_multi_horizon(second, n_jobs=1)
+        np.testing.assert_array_equal(self.predictor.predict(second), fresh.predict(second))
+        np.testing.assert_array_equal(self.predictor.predict_horizons(second), fresh.predict_horizons(second))
+    
+    def test_compiled_inference_matches_sklearn(self):
+        """Test that compiled tree inference is identical to sklearn"""
+        self.predictor.train(self.data)
+        X = self.predictor._get_feature_matrix(self.data)['X']
+        
+        compiled = self.predictor.compile_model()
+        np.testing.assert_array_equal(compiled.predict_compiled(X), self.predictor.model.predict(X))
+        np.testing.assert_array_equal(self.predictor.predict_matrix(X[:3]),
+                                      self.predictor.model.predict(X[:3]))
+
+class TestPredictionService(unittest.TestCase):
+    """Test cases for the micro-batching prediction service"""
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.data = make_event_data()
+        self.predictor = EventPredictor()
+        self.predictor.model_params['n_estimators'] = 20
+        self.predictor.train(self.data)
+        
+        self.service = PredictionService(port=0, max_wait_ms=5)
+        self.service.add_model('default', self.predictor)
+        self.url = self.service.start()
+    
+    def tearDown(self):
+        """Stop the service"""
+        self.service.stop()
+    
+    def test_concurrent_requests_are_batched(self):
+        """Test that concurrent HTTP requests share predict calls"""
+        country = self.data[self.data['country'] == 'RUS']
+        records = json.loads(country.to_json(orient='records'))
+        
+        expected = self.predictor.predict(country)
+        np.testing.assert_allclose(self.service.predict(records), expected)
+        
+        load = run_load_test(self.url, {'model': 'default', 'records': records},
+                             concurrency=8, n_requests=40)
+        self.assertEqual(load['errors'], 0)
+        self.assertGreater(load['requests_per_second'], 0)
+        
+        metrics = self.service.metrics()
+        self.assertEqual(metrics['requests'], 41)
+        self.assertLess(metrics['batches'], 41)
+        self.assertEqual(metrics['latency_ms']['count'], 41)
+        self.assertGreater(metrics['batch_rows']['mean'], len(records))
+
+class TestNarrativeAnalyzer(unittest.TestCase):
+    """Test cases for narrative-based GTI scoring"""
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.analyzer = NarrativeAnalyzer()
+        self.narratives = [
+            "Military tensions escalate as nuclear threats are issued",
+            "Diplomatic talks continue despite ongoing disagreements",
+            "Economic sanctions imposed following territorial disputes",
+            "Peace negotiations show promising signs of cooperation",
+            "Software warning issued over pipeline hacking",
+            "A trade war looms as the embargo on oil deepens"
+        ]
+    
+    def test_keyword_matching_uses_word_boundaries(self):
+        """Test whole-word, phrase and plural keyword matching"""
+        result = self.analyzer.analyze_narrative_sentiment("Software warning about warnings")
+        self.assertEqual(result['high_tension_keywords'], 0)
+        self.assertEqual(result['moderate_tension_keywords'], 1)
+        
+        result = self.analyzer.analyze_narrative_sentiment("Threats and tensions grow over the trade war")
+        self.assertEqual(result['high_tension_keywords'], 2)
+        self.assertEqual(result['moderate_tension_keywords'], 1)
+        
+        self.assertEqual(self.analyzer._identify_risk_factors(["A trade war and cyber attacks"]),
+                         ['Economic Sanctions', 'Cyber Warfare'])
+        self.assertEqual(self.analyzer._identify_risk_factors(["The bordering regions"]), [])
+        
+        # The corpus scan agrees with per-text matching (case, spacing, phrases)
+        matcher = self.analyzer.keyword_matcher
+        texts = ["Trade  WARS loom", "İstanbul war talks", "", "sanctions and Sanctions"]
+        matrix = matcher.term_matrix(texts).toarray()
+        for row, text in zip(matrix, texts):
+            self.assertEqual(set(np.flatnonzero(row)), set(matcher.find_terms(text)))
+        self.assertEqual(matrix[0].sum(), 2)
+    
+    def test_country_analysis_scores_each_text_once(self):
+        """Test that country analysis derives GTI and risk factors from one matching pass"""
+        calls = []
+        term_matrix = self.analyzer.keyword_matcher.term_matrix
+        
+        def counting_term_matrix(texts):
+            calls.append(len(texts))
+            return term_matrix(texts)
+        
+        self.analyzer.keyword_matcher.term_matrix = counting_term_matrix
+        result = self.analyzer.analyze_country_narratives('RUS', self.narratives, ['official'] * 6)
+        
+        self.assertEqual(calls, [len(self.narratives)])
+        self.assertEqual(result['gti_score'],
+                         self.analyzer.calculate_gti_score(self.narratives, ['official'] * 6)['gti_score'])
+        self.assertEqual(result['risk_factors'], self.analyzer._identify_risk_factors(self.narratives))
+        self.assertEqual(self.analyzer.analyze_country_narratives('RUS', [])['risk_factors'], [])
+    
+    def test_batch_scoring_matches_per_text(self):
+        """Test that corpus scoring equals per-text analysis and source weighting"""
+        sources = ['official', 'media', 'social', 'academic']
+        scores = self.analyzer.score_corpus(self.narratives, sources)
+        
+        for i, narrative in enumerate(self.narratives):
+            single = self.analyzer.analyze_narrative_sentiment(narrative)
+            self.assertAlmostEqual(scores['tension_score'][i], single['tension_score'])
+            self.assertEqual(scores['sentiment'][i], single['sentiment'])
+            self.assertEqual(scores['confidence'][i], single['confidence'])
+        
+        np.testing.assert_allclose(scores['source_weight'], [1.5, 1.0, 0.7, 1.2, 1.0, 1.0])
+        
+        result = self.analyzer.calculate_gti_score(self.narratives, sources)
+        expected = np.sum(scores['tension_score'] * scores['source_weight']) / len(self.narratives)
+        self.assertAlmostEqual(result['gti_score'], round(expected, 2))
+        self.assertEqual(len(result['analysis']), len(self.narratives))
+    
+    def test_parallel_scoring_matches_serial(self):
+        """Test that chunked multi-process scoring merges to the serial result"""
+        sources = ['official', 'media', 'social']
+        serial = self.analyzer.calculate_gti_score(self.narratives, sources)
+        parallel = self.analyzer.calculate_gti_score(self.narratives, sources, n_jobs=2, chunk_size=2)
+        
+        self.assertEqual(parallel['gti_score'], serial['gti_score'])
+        self.assertEqual(parallel['confidence'], serial['confidence'])
+        self.assertEqual(parallel['analysis'], serial['analysis'])
+        
+        # Reused workers must follow edited source weights and lexicons
+        self.analyzer.source_weights['official'] = 3.0
+        self.analyzer.tension_keywords['moderate_tension'].append('dialogue')
+        self.analyzer.build_keyword_matcher()
+        serial = self.analyzer.calculate_gti_score(self.narratives, sources)
+        parallel = self.analyzer.calculate_gti_score(self.narratives, sources, n_jobs=2, chunk_size=2)
+        self.assertEqual(parallel['analysis'], serial['analysis'])
+    
+    def test_near_duplicates_are_scored_once(self):
+        """Test near-duplicate clustering and duplicate down-weighting in GTI"""
+        wire = ("Officials confirmed on Monday that troops were moved to the border region "
+                "after a missile test raised fears of a wider military conflict in the area")
+        copies = [wire, wire.replace("Monday", "Tuesday"), wire + " (Reuters)"]
+        narratives = copies + self.narratives[3:4]
+        
+        labels = self.analyzer.duplicate_detector.cluster(narratives)
+        np.testing.assert_array_equal(labels, [0, 0, 0, 3])
+        
+        # A bounded word-hash memo resets between chunks without changing clusters
+        bounded = NearDuplicateDetector(max_vocabulary=5, chunk_size=1)
+        np.testing.assert_array_equal(bounded.cluster(narratives), labels)
+        self.assertLess(len(bounded._vocabulary), 30)
+        
+        result = self.analyzer.calculate_gti_score(narratives, deduplicate=True, duplicate_weight=0.0)
+        unique = self.analyzer.calculate_gti_score([wire, self.narratives[3]])
+        self.assertAlmostEqual(result['gti_score'], unique['gti_score'])
+        self.assertEqual([a['duplicate_of'] for a in result['analysis']], [-1, 0, 0, -1])
+    
+    def test_analysis_cache_reuses_texts(self):
+        """Test memoized analyses, hit counters, persistence and lexicon invalidation"""
+        uncached = self.analyzer.analyze_country_narratives('RUS', self.narratives)
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache_path = os.path.join(tmpdir, 'analyses.sqlite')
+            self.analyzer.enable_analysis_cache(cache_path=cache_path)
+            
+            first = self.analyzer.analyze_country_narratives('RUS', self.narratives)
+            self.assertEqual(first['narrative_analysis'], uncached['narrative_analysis'])
+            self.assertEqual(first['risk_factors'], uncached['risk_factors'])
+            
+            # GTI and risk factors come from one lookup per text
+            stats = self.analyzer.get_cache_stats()
+            self.assertEqual(stats['misses'], len(self.narratives))
+            self.assertEqual(stats['hits'], 0)
+            
+            self.analyzer.analyze_country_narratives('RUS', self.narratives)
+            self.assertEqual(self.analyzer.get_cache_stats()['hits'], len(self.narratives))
+            
+            # A fresh analyzer reads the persisted analyses (case/whitespace-insensitive keys)
+            other = NarrativeAnalyzer()
+            other.enable_analysis_cache(cache_path=cache_path)
+            other.calculate_gti_score([text.upper() for text in self.narratives])
+            self.assertEqual(other.get_cache_stats()['disk_hits'], len(self.narratives))
+            other.analysis_cache.close()
+            
+            # Editing the lexicon invalidates cached analyses
+            self.analyzer.tension_keywords['high_tension'].append('looms')
+            self.analyzer.build_keyword_matcher()
+            rescored = self.analyzer.calculate_gti_score(self.narratives)
+            self.assertGreater(rescored['analysis'][5]['high_tension_keywords'],
+                               first['narrative_analysis'][5]['high_tension_keywords'])
+            self.analyzer.analysis_cache.close()
+    
+    def test_learned_classifier_trains_out_of_core(self):
+        """Test streamed classifier training, mmap persistence and keyword fallback"""
+        rng = np.random.RandomState(0)
+        hostile = ['troops shelled the border town', 'missile strikes hit the capital',
+                   'army mobilizes as threats grow']
+        calm = ['ministers signed a trade accord', 'leaders praised the new friendship',
+                'delegations agreed on cultural exchange']
+        rows = [{'text': f"{(hostile if label else calm)[rng.randint(3)]} {i}", 'label': 90 if label else 10}
+                for i, label in enumerate(rng.randint(0, 2, size=400))]
+        keyword_result = self.analyzer.calculate_gti_score(hostile + calm)
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'labelled.jsonl.gz')
+            pd.DataFrame(rows).to_json(path, orient='records', lines=True, compression='gzip')
+            
+            classifier = self.analyzer.train_classifier(path, classes=[10, 90], chunksize=100,
+                                                        n_features=2 ** 16)
+            self.assertEqual(classifier.n_samples_seen, 400)
+            
+            scores = self.analyzer.score_corpus(hostile + calm)['tension_score']
+            self.assertTrue(np.all(scores[:3] > 50))
+            self.assertTrue(np.all(scores[3:] < 50))
+            
+            artifact = os.path.join(tmpdir, 'classifier')
+            self.analyzer.save_classifier(artifact)
+            loaded = NarrativeAnalyzer()
+            loaded.load_classifier(artifact)
+            self.assertIsInstance(loaded.classifier._feature_log_prob.base, np.memmap)
+            np.testing.assert_allclose(loaded.score_corpus(hostile + calm)['tension_score'], scores, rtol=1e-5)
+        
+        # Keyword scoring stays available as a fallback
+        self.analyzer.use_classifier = False
+        self.assertEqual(self.analyzer.calculate_gti_score(hostile + calm)['gti_score'], keyword_result['gti_score'])
+    
+    def test_embedding_scorer_caches_embeddings(self):
+        """Test the embedding scorer head and its memory-mapped float16 cache"""
+        encoded = []
+        
+        def encoder(texts):
+            # Deterministic bag-of-letters embedding standing in for a sentence model
+            encoded.extend(texts)
+            vectors = np.zeros((len(texts), 26), dtype=np.float32)
+            for i, text in enumerate(texts):
+                for char in text.lower():
+                    if 'a' <= char <= 'z':
+                        vectors[i, ord(char) - 97] += 1
+            return vectors
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            scorer = self.analyzer.enable_embedding_scorer(encoder=encoder, cache_dir=tmpdir, batch_size=2)
+            first = self.analyzer.score_corpus(self.narratives)['tension_score']
+            self.assertTrue(np.all((first >= 0) & (first <= 100)))
+            
+            # Cached texts are not encoded again, also after reopening the store
+            encoded.clear()
+            scorer.store.close()
+            reopened = self.analyzer.enable_embedding_scorer(encoder=encoder, cache_dir=tmpdir)
+            reopened.embed(self.narratives)
+            self.assertEqual(encoded, ['dimension probe'] + self.analyzer.tension_keywords['high_tension']
+                             + self.analyzer.tension_keywords['diplomatic'])
+            self.assertEqual(reopened.store.vectors.dtype, np.float16)
+            
+            reopened.fit(self.narratives, [90, 20, 70, 5, 40, 60])
+            scores = self.analyzer.calculate_gti_score(self.narratives)
+            self.assertEqual(len(scores['analysis']), len(self.narratives))
+            reopened.store.close()
+            
+            # Another encoder gets its own version and cannot reuse the store
+            def reversed_encoder(texts):
+                return encoder(texts)[:, ::-1]
+            
+            with self.assertRaises(ValueError):
+                EmbeddingScorer(encoder=reversed_encoder, cache_dir=tmpdir)
+        
+        first = self.analyzer.enable_embedding_scorer(EmbeddingScorer(encoder=encoder))
+        second = self.analyzer.enable_embedding_scorer(EmbeddingScorer(encoder=reversed_encoder))
+        self.assertNotEqual(first.version, second.version)
+        
+        # A case-sensitive encoder gets one analysis cache entry per exact text
+        def cased_encoder(texts):
+            capitals = [[sum(char.isupper() for char in text)] for text in texts]
+            return np.hstack([encoder(texts), np.asarray(capitals, dtype=np.float32)])
+        
+        cased = self.analyzer.enable_embedding_scorer(EmbeddingScorer(encoder=cased_encoder))
+        self.analyzer.enable_analysis_cache()
+        texts = ['Talks resume amid threats', 'TALKS RESUME AMID THREATS']
+        expected = cased.score(texts)
+        self.assertNotEqual(expected[0], expected[1])
+        np.testing.assert_array_equal(self.analyzer.score_corpus(texts)['tension_score'], expected)
+        np.testing.assert_array_equal(self.analyzer.score_corpus(texts[::-1])['tension_score'], expected[::-1])
+    
+    def test_result_modes(self):
+        """Test summary, columnar and DataFrame result modes against the full result"""
+        sources = ['official', 'media', 'social']
+        full = self.analyzer.calculate_gti_score(self.narratives, sources)
+        
+        summary = self.analyzer.calculate_gti_score(self.narratives, sources, result_mode='summary')
+        self.assertNotIn('analysis', summary)
+        self.assertEqual(summary['gti_score'], full['gti_score'])
+        self.assertEqual(summary['confidence'], full['confidence'])
+        
+        columnar = self.analyzer.calculate_gti_score(self.narratives, sources, result_mode='columnar')
+        np.testing.assert_allclose(columnar['analysis']['weighted_tension'],
+                                   [a['weighted_tension'] for a in full['analysis']])
+        
+        frame = self.analyzer.calculate_gti_score(self.narratives, sources, result_mode='dataframe')['analysis']
+        self.assertEqual(frame.to_dict('records'), full['analysis'])
+        
+        country = self.analyzer.analyze_country_narratives('RUS', self.narratives, result_mode='summary')
+        self.assertNotIn('narrative_analysis', country)
+        self.assertEqual(country['narrative_count'], len(self.narratives))
+        
+        with self.assertRaises(ValueError):
+            self.analyzer.calculate_gti_score(self.narratives, result_mode='rows')
+        
+        # Empty input keeps each mode's shape
+        self.assertNotIn('analysis', self.analyzer.calculate_gti_score([], result_mode='summary'))
+        empty = self.analyzer.calculate_gti_score([], result_mode='columnar')
+        self.assertEqual(empty['gti_score'], 50)
+        self.assertEqual(set(empty['analysis']), set(columnar['analysis']))
+        self.assertEqual(len(empty['analysis']['tension_score']), 0)
+        empty_country = self.analyzer.analyze_country_narratives('RUS', [], result_mode='dataframe')
+        self.assertTrue(empty_country['narrative_analysis'].empty)
+        self.assertEqual(list(empty_country['narrative_analysis'].columns), list(frame.columns))
+    
+    def test_narrative_report_modes(self):
+        """Test report metrics, top-k hotspots, compact mode and DataFrame input"""
+        analyses = [
+            self.analyzer.analyze_country_narratives(country, texts)
+            for country, texts in (('RUS', self.narratives[:1]), ('UKR', self.narratives[2:3]),
+                                   ('FRA', self.narratives[3:4]), ('CHN', self.narratives[5:]))
+        ]
+        gti = [analysis['gti_score'] for analysis in analyses]
+        
+        report = self.analyzer.generate_narrative_report(analyses)
+        self.assertAlmostEqual(report['global_metrics']['global_gti_score'], round(np.mean(gti), 2))
+        self.assertEqual(report['global_metrics']['max_gti_score'], max(gti))
+        self.assertEqual(report['hotspots'], [a for a in analyses if a['gti_score'] > 70])
+        self.assertEqual(report['top_risk_factors'][0], ('Economic Sanctions', 2))
+        
+        compact = self.analyzer.generate_narrative_report(analyses, compact=True, max_hotspots=1)
+        self.assertEqual(compact['global_metrics'], report['global_metrics'])
+        self.assertEqual(len(compact['hotspots']), 1)
+        self.assertEqual(set(compact['hotspots'][0]), {'country', 'gti_score', 'gti_level'})
+        self.assertNotIn('country_analyses', compact)
+        
+        frame = pd.DataFrame([{k: v for k, v in a.items() if k != 'narrative_analysis'} for a in analyses])
+        from_frame = self.analyzer.generate_narrative_report(frame, compact=True, max_hotspots=1)
+        self.assertEqual(from_frame['global_metrics'], report['global_metrics'])
+        self.assertEqual(from_frame['top_risk_factors'], report['top_risk_factors'])
+        self.assertEqual(from_frame['hotspots'].to_dict('records'), compact['hotspots'])
+        
+        full_frame = self.analyzer.generate_narrative_report(frame)
+        self.assertIs(full_frame['country_analyses'], frame)
+        self.assertEqual(list(full_frame['hotspots']['country']), [a['country'] for a in report['hotspots']])
+    
+    def test_news_archive_feeds_scoring(self):
+        """Test lazy gzip archive reading, country routing and batched GTI scoring"""
+        records = [
+            {'title': 'Kremlin warns Kyiv', 'text': 'Russian missile strikes hit Ukrainian cities',
+             'source_type': 'official', 'published': '2024-03-01T10:00:00'},
+            {'text': 'Beijing and Washington resume trade talks', 'source_type': 'media',
+             'published': '2024-03-01T11:00:00'},
+            {'text': 'Troops mass near the border', 'country': 'IND', 'published': '2024-03-01T12:00:00'},
+            {'text': 'Weather is mild across the region', 'published': '2024-03-01T13:00:00'},
+            {'text': 'bra prices climb', 'published': '2024-03-01T14:00:00'},
+            {'text': 'Ind. candidate leads in Latin American polls', 'published': '2024-03-01T15:00:00'},
+            {'text': 'Talks between RUS and Rus officials', 'published': '2024-03-01T16:00:00'}
+        ]
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'news.jsonl.gz')
+            with gzip.open(path, 'wt', encoding='utf-8') as f:
+                for record in records:
+                    f.write(json.dumps(record) + '\n')
+                f.write('{not json\n')
+                f.write('[1, 2]\n')
+                f.write(json.dumps({'title': '', 'source_type': 'media'}) + '\n')
+            
+            reader = NewsArchiveReader(batch_size=2)
+            batches = list(reader.iter_batches(tmpdir))
+            countries = [country for batch in batches for country in batch['countries']]
+            self.assertEqual(sorted(countries), ['CHN', 'IND', 'RUS', 'RUS', 'UKR', 'USA'])
+            stats = {'lines': 10, 'malformed': 2, 'empty': 1, 'routed': 4, 'unrouted': 3, 'assignments': 6}
+            self.assertEqual(reader.stats, stats)
+            list(reader.iter_batches(tmpdir))
+            self.assertEqual(reader.stats, stats)
+            
+            parallel = NewsArchiveReader(batch_size=2, n_jobs=2)
+            self.assertEqual(list(parallel.iter_batches(path)), batches)
+            
+            # Texts routed to several countries are scored once
+            scored = []
+            score_corpus = self.analyzer.score_corpus
+            
+            def counting_score_corpus(texts, sources=None):
+                scored.extend(texts)
+                return score_corpus(texts, sources)
+            
+            self.analyzer.score_corpus = counting_score_corpus
+            accumulator = NewsArchiveReader().feed(GTIAccumulator(self.analyzer), path)
+            del self.analyzer.score_corpus
+            self.assertEqual(len(scored), stats['routed'])
+            expected = self.analyzer.calculate_gti_score(
+                ['Kremlin warns Kyiv. Russian missile strikes hit Ukrainian cities',
+                 'Talks between RUS and Rus officials'], ['official', None])
+            self.assertEqual(accumulator.get_gti('RUS')['gti_score'], expected['gti_score'])
+            
+            streamed = self.analyzer.stream_gti(NewsArchiveReader().stream_items(path))
+            self.assertEqual(streamed.snapshot(), accumulator.snapshot())
+    
+    def test_news_archive_ignores_alias_lookalikes(self):
+        """Test that phrases such as "Indian Ocean" do not route texts to countries"""
+        routes = {
+            'Storm builds over the Indian Ocean': [],
+            'Paris Hilton opens a new hotel': [],
+            'Washington state wildfires spread': [],
+            'German shepherds win the dog show': [],
+            'Indian troops join talks in Paris': ['FRA', 'IND'],
+            'Washington warns Moscow over the Indian Ocean drills': ['RUS', 'USA']
+        }
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'news.jsonl')
+            with open(path, 'w', encoding='utf-8') as f:
+                for text in routes:
+                    f.write(json.dumps({'text': text}) + '\n')
+            
+            routed = {}
+            for text, _, _, country in NewsArchiveReader().stream_items(path):
+                routed.setdefault(text, []).append(country)
+            self.assertEqual({text: sorted(countries) for text, countries in routed.items()},
+                             {text: countries for text, countries in routes.items() if countries})
+            
+            unfiltered = NewsArchiveReader(exclusions=[])
+            self.assertIn('IND', [item[3] for item in unfiltered.stream_items(path)])
+    
+    def test_streaming_gti_matches_batch(self):
+        """Test that the streaming accumulator reproduces calculate_gti_score per country"""
+        sources = ['official', 'media', 'social', 'academic', 'media', 'official']
+        countries = ['RUS', 'UKR', 'RUS', 'UKR', 'RUS', 'UKR']
+        stream = ((text, source, 1700000000 + i, country)
+                  for i, (text, source, country) in enumerate(zip(self.narratives, sources, countries)))
+        
+        accumulator = self.analyzer.stream_gti(stream, batch_size=4)
+        
+        for country in ('RUS', 'UKR'):
+            idx = [i for i, c in enumerate(countries) if c == country]
+            expected = self.analyzer.calculate_gti_score([self.narratives[i] for i in idx],
+                                                         [sources[i] for i in idx])
+            current = accumulator.get_gti(country)
+            self.assertAlmostEqual(current['gti_score'], expected['gti_score'])
+            self.assertAlmostEqual(current['confidence'], expected['confidence'])
+            self.assertEqual(current['gti_level'], expected['gti_level'])
+            self.assertEqual(current['narrative_count'], 3)
+        
+        self.assertEqual(set(accumulator.snapshot()), {'RUS', 'UKR'})
+        
+        # Countries without narratives report the neutral level like calculate_gti_score
+        empty = accumulator.get_gti('CHN')
+        self.assertEqual(empty['gti_level'], self.analyzer.calculate_gti_score([])['gti_level'])
+        self.assertEqual(empty['narrative_count'], 0)
+    
+    def test_windowed_gti_rolls_off_expired_buckets(self):
+        """Test sliding-window GTI against rescoring the texts inside each window"""
+        index = self.analyzer.enable_windowed_gti({'24h': 24 * 3600, '7d': 7 * 24 * 3600})
+        start = 1700000000
+        hours = [0, 5, 30, 100, 170, 171]
+        index.update(self.narratives, countries=['RUS'] * 6,
+                     timestamps=[start + h * 3600 for h in hours])
+        
+        def expected(window_hours):
+            now_bucket = (start + 171 * 3600) // 3600
+            inside = [text for text, h in zip(self.narratives, hours)
+                      if now_bucket - (start + h * 3600) // 3600 < window_hours]
+            return self.analyzer.calculate_gti_score(inside)
+        
+        for name, window_hours in (('24h', 24), ('7d', 168)):
+            result = index.get_gti('RUS', name)
+            self.assertEqual(result['narrative_count'], expected(window_hours)['narrative_count'])
+            self.assertAlmostEqual(result['gti_score'], expected(window_hours)['gti_score'])
+        
+        # Moving the clock a week ahead empties both windows
+        empty = index.get_gti('RUS', '7d', now=start + 400 * 3600)
+        self.assertEqual(empty['narrative_count'], 0)
+        self.assertEqual(empty['gti_level'], self.analyzer.calculate_gti_score([])['gti_level'])
+        self.assertIn('gti_level', index.get_gti('CHN', '24h'))
+        with self.assertRaises(ValueError):
+            index.get_gti('RUS', '1y')
+
 class TestDataIntegration(unittest.TestCase):
     """Test data integration and processing"""
     
@@ -254,6 +1049,9 @@ def run_tests():
     test_suite.addTest(unittest.makeSuite(TestGeopoliticalRiskAnalyzer))
     test_suite.addTest(unittest.makeSuite(TestWorldWarRiskAnalyzer))
     test_suite.addTest(unittest.makeSuite(TestMilitaryAnalyzer))
+    test_suite.addTest(unittest.makeSuite(TestEventPredictor))
+    test_suite.addTest(unittest.makeSuite(TestPredictionService))
+    test_suite.addTest(unittest.makeSuite(TestNarrativeAnalyzer))
     test_suite.addTest(unittest.makeSuite(TestDataIntegration))
     
     # Run tests